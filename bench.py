@@ -0,0 +1,259 @@
+import contextlib
+import argparse
+import platform
+import random
+import json
+import time
+import sys
+import os
+import io
+
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+
+import numpy as np
+import pygame
+
+from game import Game
+from game.console import Console
+from game.tiles import touching
+from main import RESOLUTIONS
+
+
+SEED = 1
+WORLD_SEED = 0.5
+
+GROW_SIZES = (4, 6, 8, 12)  # Chunks along each side
+MOB_COUNTS = (100, 1000, 5000)
+ERODING = 500  # Rock tiles put next to water for slow_tick to wear away
+MUDDY = 2000  # Mud tiles put next to grass for super_slow_tick to grow over
+HOSTILES = 100  # Hostile mobs put around the player for slow_tick to target
+
+
+def seed():
+    random.seed(SEED)
+    np.random.seed(SEED)
+
+
+def timed(func, repeat, number=1, setup=None):
+    # Best and median seconds per call over repeat runs of number calls, calling setup
+    # (untimed) before each run
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        runs.append((time.perf_counter() - start) / number)
+    runs.sort()
+    return {'best': runs[0], 'median': runs[len(runs) // 2], 'calls': repeat * number}
+
+
+def fresh_world(game, size=None):
+    gs = game.game_scene
+    if size is not None:
+        gs.X_CHUNKS = gs.Y_CHUNKS = size
+        gs.WIDTH, gs.HEIGHT = size * gs.CHUNK_W, size * gs.CHUNK_H
+    seed()
+    gs.reset()
+    gs.grow(WORLD_SEED)
+    return gs
+
+
+def set_resolution(game, width, height):
+    game.screen = pygame.display.set_mode((width, height), game.FLAGS)
+    game.console.bind(game.screen)
+    for i in game.scenes:
+        i.screen = game.screen
+    # noinspection PyArgumentList
+    game.game_scene.col_surf = pygame.Surface(game.screen.get_size(), pygame.SRCALPHA).convert_alpha()
+
+
+def bench_grow(game, repeat):
+    for size in GROW_SIZES:
+        yield 'grow/{0}x{0}'.format(size), timed(lambda: fresh_world(game, size), repeat)
+    fresh_world(game, type(game.game_scene).X_CHUNKS)
+
+
+def bench_ticks(game, repeat):
+    gs = fresh_world(game)
+    gs.pos = [gs.WIDTH // 2 * gs.ground.tw, gs.HEIGHT // 2 * gs.ground.th]
+    water = gs.IS_WATER[gs.world]
+    grass = gs.world == gs.GROUND.id(gs.GRASS)
+
+    # A fresh world has nothing to erode, no mud and nothing hostile about, so give the
+    # ticks some of each to get through
+    seed()
+    world = gs.world.copy()
+    shore = np.argwhere(~water & touching(water))
+    rock = shore[np.random.choice(len(shore), min(ERODING, len(shore)), replace=False)]
+    world[rock[:, 0], rock[:, 1]] = gs.GROUND.id(gs.ROCK_R)
+    lawn = np.argwhere(grass & ~touching(~grass))
+    mud = lawn[np.random.choice(len(lawn), min(MUDDY, len(lawn)), replace=False)]
+    world[mud[:, 0], mud[:, 1]] = gs.GROUND.id(gs.MUD)
+
+    mobs = []
+    for _ in range(HOSTILES):
+        kind = random.choice(gs.HOSTILE)
+        x, y = gs.pos[0] + random.randint(-8, 8) * gs.ground.tw, gs.pos[1] + random.randint(-8, 8) * gs.ground.th
+        mobs.append((x, y, gs.MOBS.id(kind), gs.A_HEALTH[kind], random.randint(0, 3), random.randint(16, 64)))
+
+    def setup():
+        # Both ticks use up their work, so put it all back before every run
+        seed()
+        for x, y in np.argwhere(gs.world != world).tolist():
+            gs.set_at(x, y, gs.GROUND[world[x, y]])
+        gs.erosion.take()
+        for x, y in rock.tolist():
+            gs.erosion.touch(x, y)
+        gs.animals.clear()
+        for i in mobs:
+            gs.animals.add(*i)
+        gs.flow_stale = True
+        gs.health = gs.MAX_HEALTH
+
+    yield 'slow_tick', timed(gs.slow_tick, repeat, 10, setup)
+    yield 'super_slow_tick', timed(gs.super_slow_tick, repeat, 10, setup)
+
+
+def bench_mobs(game, repeat):
+    for count in MOB_COUNTS:
+        gs = fresh_world(game)
+        gs.pos = [gs.WIDTH // 2 * gs.ground.tw, gs.HEIGHT // 2 * gs.ground.th]
+
+        mobs = []
+        for _ in range(count):
+            x, y = gs.spawnable.sample()
+            kind = random.choice(gs.MOBS.tiles)
+            mobs.append((x * gs.ground.tw, y * gs.ground.th, gs.MOBS.id(kind), gs.A_HEALTH[kind],
+                         random.randint(0, 3), random.randint(16, 64)))
+
+        def setup():
+            # Mobs wander off the edge of the world, so start every run from the same lot
+            seed()
+            gs.animals.clear()
+            for i in mobs:
+                gs.animals.add(*i)
+            gs.update_flow()  # Only worked out once there's something hostile to follow it
+
+        yield 'med_tick/{}'.format(count), timed(gs.med_tick, repeat, 10, setup)
+
+
+def bench_render(game, repeat):
+    gs = fresh_world(game)
+    gs.pos = [gs.WIDTH // 2 * gs.ground.tw, gs.HEIGHT // 2 * gs.ground.th]
+    for width, height in RESOLUTIONS:
+        set_resolution(game, width, height)
+        gs.tick(0)
+        gs.render()  # Build the chunks on screen first
+        yield 'render/{}x{}'.format(width, height), timed(gs.render, repeat, 5)
+    set_resolution(game, Game.WIDTH, Game.HEIGHT)
+
+
+def bench_text(game, repeat):
+    gs = game.game_scene
+    font = gs.font
+    texts = ['Incoming wave. Next wave in {}m'.format(n) for n in range(50)]
+    queue = []
+
+    def render():
+        font.render(queue.pop(), True)
+
+    def cold():
+        # Every string is new to the cache, so each call draws its glyphs
+        font._cache.clear()
+        queue[:] = texts
+
+    def warm():
+        # Every string is already in the cache
+        cold()
+        for text in texts:
+            font.render(text, True)
+
+    yield 'BMPFont.render/cold', timed(render, repeat, len(texts), cold)
+    yield 'BMPFont.render/warm', timed(render, repeat, len(texts), warm)
+
+    # A console of our own, echoing into a StringIO rather than all over our output
+    with contextlib.redirect_stdout(io.StringIO()):
+        console = Console(game.screen)
+        for n in range(200):
+            console.log('Line {} of console output for the benchmark'.format(n))
+    console.show()
+    yield 'Console.render', timed(console.render, repeat, 10)
+
+
+BENCHMARKS = {
+    'grow': bench_grow,
+    'ticks': bench_ticks,
+    'mobs': bench_mobs,
+    'render': bench_render,
+    'text': bench_text,
+}
+
+
+def compare(results, baseline, tolerance):
+    # Names of benchmarks more than tolerance slower than in baseline
+    slower = []
+    for name, result in results.items():
+        if name in baseline:
+            ratio = result['best'] / baseline[name]['best']
+            flag = ''
+            if ratio > 1 + tolerance:
+                slower.append(name)
+                flag = '  REGRESSION'
+            sys.stderr.write('{:<24} {:>10.3f}ms {:>7.2f}x{}\n'.format(name, result['best'] * 1000, ratio, flag))
+        else:
+            sys.stderr.write('{:<24} {:>10.3f}ms     new\n'.format(name, result['best'] * 1000))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time world gen, simulation and rendering on the dummy SDL driver')
+    parser.add_argument('--only', action='append', choices=list(BENCHMARKS), help='group to run (default: all)')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='runs of each benchmark')
+    parser.add_argument('-o', '--out', help='write JSON results here instead of stdout')
+    parser.add_argument('-b', '--baseline', help='JSON results to compare against')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.25,
+                        help='fraction slower than the baseline that counts as a regression')
+    parser.add_argument('--save-baseline', help='also write results here, for comparing future runs against')
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    seed()
+    # The game's console grabs stdout, but we want it to ourselves for the JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        game = Game(headless=True)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        for bench, result in BENCHMARKS[name](game, args.repeat):
+            results[bench] = result
+
+    output = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'repeat': args.repeat,
+            'seed': SEED,
+        },
+        'results': results,
+    }
+    for path in (args.out, args.save_baseline):
+        if path is not None:
+            with open(path, 'w') as f:
+                json.dump(output, f, indent=2)
+    if args.out is None:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+
+class ChunkCache:
+    # Rendered chunk surfaces, built on demand and kept in least-recently-used
+    # order. Anything built by `build` must be rebuildable from the world data,
+    # because chunks get thrown away as soon as we go over budget.
+    def __init__(self, build, budget):
+        self._build = build
+        self.budget = budget
+
+        self._chunks = OrderedDict()
+        self._used = set()
+        self.memory = 0
+
+    def __contains__(self, key):
+        return key in self._chunks
+
+    def __len__(self):
+        return len(self._chunks)
+
+    @staticmethod
+    def _size(chunk):
+        return sum(i.get_pitch() * i.get_height() for i in chunk)
+
+    def get(self, cx, cy):
+        key = cx, cy
+        if key in self._chunks:
+            self._chunks.move_to_end(key)
+        else:
+            self._chunks[key] = self._build(cx, cy)
+            self.memory += self._size(self._chunks[key])
+        self._used.add(key)
+
+        return self._chunks[key]
+
+    def peek(self, cx, cy):
+        # Get a chunk only if it's already built, without touching its age
+        return self._chunks.get((cx, cy))
+
+    def trim(self):
+        # Evict down to budget. Anything used since the last trim is on screen,
+        # so keep hold of it even if that means going over.
+        for key in list(self._chunks):
+            if self.memory <= self.budget:
+                break
+            if key not in self._used:
+                self.memory -= self._size(self._chunks.pop(key))
+        self._used.clear()
+
+    def clear(self):
+        self._chunks.clear()
+        self._used.clear()
+        self.memory = 0
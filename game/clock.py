@@ -0,0 +1,34 @@
+import time
+
+
+class GameClock:
+    # Seconds of game time. Runs off the monotonic clock so it never jumps when the
+    # system time changes, and stands still while paused.
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._paused_at = None
+        self._lost = 0
+
+    def now(self):
+        if self._paused_at is not None:
+            return self._paused_at - self._start - self._lost
+        return time.perf_counter() - self._start - self._lost
+
+    @property
+    def paused(self):
+        return self._paused_at is not None
+
+    def pause(self):
+        if self._paused_at is None:
+            self._paused_at = time.perf_counter()
+
+    def resume(self):
+        if self._paused_at is not None:
+            self._lost += time.perf_counter() - self._paused_at
+            self._paused_at = None
+
+    def toggle(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
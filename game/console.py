@@ -1,5 +1,6 @@
 import pygame
 
+from collections import deque
 from functools import wraps
 import traceback
 import sys
@@ -31,6 +32,7 @@ class Console:
     PS2 = '... '
 
     LINE_WIDTH = 100
+    MAX_LINES = 1000  # Older lines get dropped
 
     def __init__(self, screen=None, height=400):
         self._stdout = sys.stdout
@@ -38,9 +40,15 @@ class Console:
 
         self._screen = screen
         self.height = height
-        self._lines = []
+        self._lines = deque(maxlen=self.MAX_LINES)  # [kind, text, surface once rendered]
         self._l_buff = ''
 
+        # What's on the backing surface, so render only redraws what's changed
+        self._surface = None
+        self._version = 0  # Bumped whenever _lines changes
+        self._drawn = self._drawn_prompt = None
+        self._prompt_y = 0
+
         self.log('Debug console started')
 
         self.background = (0, 0, 0, 230)
@@ -73,10 +81,7 @@ class Console:
     def _write(self, text):
         for char in text:
             if char == '\n':
-                self._lines.append((
-                    self._LOG_TEXT,
-                    self._l_buff
-                ))
+                self._add_line(self._LOG_TEXT, self._l_buff)
                 self._l_buff = ''
                 continue
             if char == '\r':
@@ -120,8 +125,13 @@ class Console:
         self.hide()
 
     # Rest 'o stuff
+    def _add_line(self, kind, text):
+        self._lines.append([kind, text, None])
+        self._version += 1
+
     def clear(self):
-        self._lines = []
+        self._lines.clear()
+        self._version += 1
 
     def log(self, text):
         self.write(text + '\n')
@@ -177,10 +187,7 @@ class Console:
         self.active = not self.active
 
     def _return(self):
-        self._lines.append((
-            self._PROMPT_TEXT,
-            self._prompt + self._current
-        ))
+        self._add_line(self._PROMPT_TEXT, self._prompt + self._current)
 
         self._inp += self._current
 
@@ -210,10 +217,7 @@ class Console:
                     if n in [1, 2]:
                         # Hide that we exists
                         continue
-                    self._lines.append((
-                        self._ERROR_TEXT,
-                        i
-                    ))
+                    self._add_line(self._ERROR_TEXT, i)
         self._current = self._inp = ''
         self._cursor = 0
 
@@ -273,30 +277,54 @@ class Console:
             rect = pygame.Rect(0, 0, self._screen.get_width(), min(self.height, self._screen.get_height()))
         else:
             rect = pygame.Rect(rect)
-        surface = pygame.Surface((rect.width, rect.height)).convert_alpha()
-        surface.fill(self.background)
+        if self._surface is None or self._surface.get_size() != rect.size:
+            # noinspection PyArgumentList
+            self._surface = pygame.Surface(rect.size, pygame.SRCALPHA).convert_alpha()
+            self._drawn = None
 
+        # Log lines only get redrawn when there are new ones, and the prompt on keystrokes
         line_height = self.font.get_linesize()
-        if len(self._lines) * line_height < rect.height:
-            n = -1
+        if self._drawn != self._version:
+            self._render_lines(line_height)
+        prompt = self._prompt, self._current, self._cursor
+        if self._drawn_prompt != prompt:
+            self._render_prompt(line_height)
+            self._drawn_prompt = prompt
+
+        self._screen.blit(self._surface, rect.topleft)
+
+    def _line(self, line):
+        if line[2] is None:
+            line[2] = self.font.render(line[1], 1, self.COLOURS[line[0]])
+        return line[2]
+
+    def _render_lines(self, line_height):
+        surface = self._surface
+        height = surface.get_height()
+        surface.fill(self.background)
+
+        if len(self._lines) * line_height < height:
             for n, line in enumerate(self._lines):
-                line = self.font.render(line[1], 1, self.COLOURS[line[0]])
-                surface.blit(line, (rect.x, rect.y + n * line_height))
-            y = rect.y + n * line_height
+                surface.blit(self._line(line), (0, n * line_height))
+            self._prompt_y = len(self._lines) * line_height
         else:
-            for n, line in enumerate(self._lines[::-1]):
-                if n * line_height > rect.height - line_height * 2:
+            for n, line in enumerate(reversed(self._lines)):
+                if n * line_height > height - line_height * 2:
                     break
-                line = self.font.render(line[1], 1, self.COLOURS[line[0]])
-                surface.blit(line, (rect.x, rect.y + rect.height - (n + 2) * line_height))
-            y = rect.y + rect.height - line_height * 2
-
-        y += line_height
-        pre_c = self.font.render(self._prompt + self._current[:self._cursor], 1, self.COLOURS[self._PROMPT_TEXT])
-        post_c = self.font.render(self._current[self._cursor:], 1, self.COLOURS[self._PROMPT_TEXT])
-        surface.blit(pre_c, (rect.x, y))
-        x = rect.x + pre_c.get_width()
-        pygame.draw.line(surface, self.COLOURS[self._PROMPT_TEXT], (x + 1, y + 2), (x + 1, y + line_height - 2))
+                surface.blit(self._line(line), (0, height - (n + 2) * line_height))
+            self._prompt_y = height - line_height
+
+        self._drawn = self._version
+        self._drawn_prompt = None
+
+    def _render_prompt(self, line_height):
+        surface, y = self._surface, self._prompt_y
+        colour = self.COLOURS[self._PROMPT_TEXT]
+        surface.fill(self.background, (0, y, surface.get_width(), max(line_height, self.font.get_height())))
+
+        pre_c = self.font.render(self._prompt + self._current[:self._cursor], 1, colour)
+        post_c = self.font.render(self._current[self._cursor:], 1, colour)
+        surface.blit(pre_c, (0, y))
+        x = pre_c.get_width()
+        pygame.draw.line(surface, colour, (x + 1, y + 2), (x + 1, y + line_height - 2))
         surface.blit(post_c, (x, y))
-
-        self._screen.blit(surface, (rect.x, rect.y))
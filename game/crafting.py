@@ -0,0 +1,32 @@
+from collections import Counter
+
+
+class RecipeBook:
+    # {ingredients: result} recipes, held as ingredient counts and indexed by
+    # ingredient so matching only ever looks at recipes using something to hand.
+    # Where several recipes could be made, the one listed first wins.
+    def __init__(self, recipes):
+        self._recipes = [(Counter(ingredients), result) for ingredients, result in recipes.items()]
+        self._uses = {}
+        for n, (needs, _) in enumerate(self._recipes):
+            for item in needs:
+                self._uses.setdefault(item, []).append(n)
+
+    def __len__(self):
+        return len(self._recipes)
+
+    def match(self, items):
+        # (ingredient counts, result) of the first recipe items can make, or None
+        have = Counter(items)
+
+        # How many of each recipe's different ingredients we have at least one of
+        found = Counter()
+        for item in have:
+            for n in self._uses.get(item, ()):
+                found[n] += 1
+
+        for n in sorted(n for n, k in found.items() if k == len(self._recipes[n][0])):
+            needs, result = self._recipes[n]
+            if all(have[i] >= k for i, k in needs.items()):
+                return needs, result
+        return None
@@ -0,0 +1,38 @@
+import heapq
+
+import numpy as np
+
+
+def distances(cost, goal):
+    # Cheapest way to get from every tile to goal, where cost[x, y] is what it
+    # takes to step onto a tile (inf for never). Unreachable tiles come out inf.
+    w, h = cost.shape
+    cost = cost.tolist()
+    dist = [[float('inf')] * h for _ in range(w)]
+
+    gx, gy = goal
+    dist[gx][gy] = 0
+    queue = [(0, gx, gy)]
+    while queue:
+        d, x, y = heapq.heappop(queue)
+        if d > dist[x][y]:
+            continue
+
+        # Anything next to here can get here for the price of this tile
+        d += cost[x][y]
+        for nx, ny in ((x, y - 1), (x - 1, y), (x, y + 1), (x + 1, y)):
+            if 0 <= nx < w and 0 <= ny < h and d < dist[nx][ny] and cost[nx][ny] != float('inf'):
+                dist[nx][ny] = d
+                heapq.heappush(queue, (d, nx, ny))
+
+    return np.array(dist)
+
+
+def flow_field(dist, steps):
+    # For every tile, the index into steps of the neighbour to head for to get
+    # closer to wherever dist was measured from. -1 where there's nowhere better.
+    w, h = dist.shape
+    padded = np.pad(dist, 1, constant_values=np.inf)
+    around = np.stack([padded[1 + dx:1 + dx + w, 1 + dy:1 + dy + h] for dx, dy in steps])
+
+    return np.where(around.min(axis=0) < dist, around.argmin(axis=0), -1).astype(np.int8)
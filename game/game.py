@@ -1,11 +1,14 @@
 import random
-import time
 import os
 
 import pygame
 
 from .scenes import *
 from .console import Console
+from .input import LiveInput, ScriptedInput
+from .profiler import Profiler
+from .clock import GameClock
+from .scheduler import Scheduler
 
 
 os.environ['SDL_VIDEO_CENTERED'] = '1'
@@ -17,16 +20,38 @@ class Game:
     HEIGHT = 720
 
     DEVEL = 'LD_DEVEL' in os.environ
+    HEADLESS = 'LD_HEADLESS' in os.environ  # No window, sound, keyboard or mouse
 
-    FPS = 0
+    FPS = 60  # Frame cap, 0 for none
+    VSYNC = 'LD_VSYNC' in os.environ  # Wait for the display rather than the frame cap
+    DIRTY = 'LD_DIRTY' in os.environ  # Only push the parts of the screen that changed
+    MAX_DIRTY = 200  # Rects to push before a flip is cheaper
+    STEP = 1 / 60  # Seconds of game time per tick
+    MAX_STEPS = 5  # Ticks to catch up on in one frame before giving up on the backlog
 
-    def __init__(self, width=None, height=None, fs=False, diff=0):
+    def __init__(self, width=None, height=None, fs=False, diff=0, headless=None, script=(), fps=None, vsync=None,
+                 dirty=None):
         if width is not None:
             self.WIDTH = width
         if height is not None:
             self.HEIGHT = height
         if fs:
             self.FLAGS |= pygame.FULLSCREEN
+        if headless is not None:
+            self.HEADLESS = headless
+        if fps is not None:
+            self.FPS = fps
+        if vsync is not None:
+            self.VSYNC = vsync
+        if dirty is not None:
+            self.DIRTY = dirty
+
+        if self.HEADLESS:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+            self.input = ScriptedInput(script)
+        else:
+            self.input = LiveInput()
 
         pygame.init()
 
@@ -38,8 +63,12 @@ class Game:
 
         pygame.display.set_icon(icon)
         pygame.display.set_caption('Brink', 'Brink')
-        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT), self.FLAGS)
+        self.screen = self.set_mode((self.WIDTH, self.HEIGHT))
         self.clock = pygame.time.Clock()
+        self.game_clock = GameClock()
+        self.scheduler = Scheduler()  # Runs on game_clock
+        self.alpha = 1  # How far render is between the last tick and the next
+        self.profiler = Profiler()
 
         self.console = Console()
         self.console.bind(self.screen)
@@ -55,7 +84,7 @@ class Game:
             LoadingScene(self),
         ]
 
-        if self.DEVEL:
+        if self.HEADLESS or self.DEVEL:
             self.game_scene.start()
         else:
             self.scenes[0].active = True
@@ -63,22 +92,33 @@ class Game:
         for i in dir(self.game_scene):
             if i[0] != '_':
                 self.console.expose(**{i: getattr(self.game_scene, i)})
-        self.console.expose(game=self, scenes=self.scenes, gs=self.game_scene, help=self.con_help, give=self.con_give)
+        self.console.expose(game=self, scenes=self.scenes, gs=self.game_scene, help=self.con_help, give=self.con_give,
+                            profiler=self.profiler, clock=self.game_clock)
 
         self.music = [
             os.path.join(base, '../assets/audio/', i)
             for i in os.listdir(os.path.join(base, '../assets/audio/'))
         ]
 
-        if not self.DEVEL:
+        if not (self.DEVEL or self.HEADLESS):
             pygame.mixer.music.load(self.music[0])
             pygame.mixer.music.play()
 
             pygame.mixer.music.set_endevent(pygame.USEREVENT + 3)
 
+    def set_mode(self, size):
+        if self.VSYNC and not self.HEADLESS:
+            try:
+                return pygame.display.set_mode(size, self.FLAGS | pygame.SCALED, vsync=1)
+            except pygame.error:
+                # No vsync to be had here, fall back on the frame cap
+                self.VSYNC = False
+        return pygame.display.set_mode(size, self.FLAGS)
+
     def con_give(self, item, amount):
         for i in dir(self.game_scene):
-            if getattr(self.game_scene, i) == item and i.isupper():
+            # Items are tuples, and plenty of other constants are arrays that won't compare
+            if i.isupper() and isinstance(getattr(self.game_scene, i), tuple) and getattr(self.game_scene, i) == item:
                 name = i
                 break
         else:
@@ -100,63 +140,113 @@ class Game:
     @staticmethod
     def con_help():
         print(' > give(ITEM, AMOUNT)')
+        print(' > profiler.report()')
+        print(' > clock.toggle()')
 
     def tick(self, dt):
-        for i in self.scenes:
-            if i.active:
-                if not i.tick(dt):
-                    break
-
-        self.clock.tick(self.FPS)
+        with self.profiler.phase('Game.tick'):
+            for i in self.scenes:
+                if i.active:
+                    with self.profiler.phase(type(i).__name__ + '.tick'):
+                        ticked = i.tick(dt)
+                    if not ticked:
+                        break
 
     def render(self):
-        for i in self.scenes:
-            if i.active:
-                if not i.render():
-                    break
+        with self.profiler.phase('Game.render'):
+            dirty = []
+            for i in self.scenes:
+                if i.active:
+                    with self.profiler.phase(type(i).__name__ + '.render'):
+                        rendered = i.render()
+                    dirty = None if dirty is None or i.dirty is None else dirty + i.dirty
+                    if not rendered:
+                        break
 
-        self.console.render()
-        pygame.display.flip()
+            with self.profiler.phase('Console.render'):
+                self.console.render()
+            if not self.DIRTY or self.console.active or dirty is None or len(dirty) > self.MAX_DIRTY:
+                pygame.display.flip()
+            elif dirty:
+                pygame.display.update(dirty)
 
     def events(self):
-        for event in pygame.event.get():
-            if not (event.type == pygame.KEYDOWN and event.key == pygame.K_BACKQUOTE):
-                if self.console.tick(event):
-                    # The console grabbed the event, ignore it
-                    continue
-
-            if event.type == pygame.QUIT:
-                self.running = False
-            elif event.type == pygame.USEREVENT + 3:
-                pygame.mixer.music.load(random.choice(self.music))
-                pygame.mixer.music.set_volume(0.3)
-                pygame.time.set_timer(pygame.USEREVENT + 4, random.randint(1000, 2500))
-            elif event.type == pygame.USEREVENT + 4:
-                pygame.mixer.music.play()
-                pygame.time.set_timer(pygame.USEREVENT + 4, 0)
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_BACKQUOTE:
-                    self.console.toggle()
-                elif event.key == pygame.K_F11:
-                    self.FLAGS ^= pygame.FULLSCREEN
-                    (w, h) = (0, 0) if self.FLAGS & pygame.FULLSCREEN else (self.WIDTH, self.HEIGHT)
-                    self.screen = pygame.display.set_mode((w, h), self.FLAGS)
-                    for i in self.scenes:
-                        i.screen = self.screen
+        with self.profiler.phase('Game.events'):
+            for event in pygame.event.get():
+                self.event(event)
+
+    def event(self, event):
+        if not (event.type == pygame.KEYDOWN and event.key == pygame.K_BACKQUOTE):
+            if self.console.tick(event):
+                # The console grabbed the event, ignore it
+                return
+
+        if event.type == pygame.QUIT:
+            self.running = False
+        elif event.type == pygame.USEREVENT + 3:
+            pygame.mixer.music.load(random.choice(self.music))
+            pygame.mixer.music.set_volume(0.3)
+            self.scheduler.after(random.uniform(1, 2.5), pygame.mixer.music.play, 'music')
+        elif event.type == pygame.WINDOWMINIMIZED:
+            self.game_clock.pause()
+        elif event.type == pygame.WINDOWRESTORED:
+            self.game_clock.resume()
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_BACKQUOTE:
+                self.console.toggle()
+            elif event.key == pygame.K_F11:
+                self.FLAGS ^= pygame.FULLSCREEN
+                (w, h) = (0, 0) if self.FLAGS & pygame.FULLSCREEN else (self.WIDTH, self.HEIGHT)
+                self.screen = self.set_mode((w, h))
+                for i in self.scenes:
+                    i.screen = self.screen
 
-            for i in self.scenes:
-                if i.active:
-                    if not i.event(event):
-                        break
+        for i in self.scenes:
+            if i.active:
+                if not i.event(event):
+                    break
 
     def mainloop(self):
-        dt = 0
+        # Tick on a fixed STEP of game time however fast we're rendering, and draw
+        # part way between ticks with whatever's left over
+        last = self.game_clock.now()
+        behind = 0
         while self.running:
-            fs = time.time()
-            self.tick(dt)
-            self.render()
+            self.profiler.frame()
             self.events()
-            dt = time.time() - fs
-            dt = min(dt, 1 / 20)
+
+            now = self.game_clock.now()
+            for job in self.scheduler.due(now):
+                job()
+            behind += now - last
+            last = now
+            steps = 0
+            while behind >= self.STEP and steps < self.MAX_STEPS:
+                self.tick(self.STEP)
+                behind -= self.STEP
+                steps += 1
+            if steps == self.MAX_STEPS:
+                # Too slow to keep up, so slow down rather than spiral
+                behind = min(behind, self.STEP)
+            self.alpha = behind / self.STEP
+
+            self.render()
+            self.clock.tick(0 if self.VSYNC else self.FPS)
 
         pygame.quit()
+
+    def simulate(self, seconds, dt=1 / 60, render=False):
+        # Run for some game time on a fixed step, as fast as we can, with scripted
+        # input fed in as it comes due. For soak tests and benchmarks, mostly headless.
+        self.alpha = 1
+        for _ in range(round(seconds / dt)):
+            self.profiler.frame()
+            for event in self.input.advance(dt):
+                self.event(event)
+
+            self.tick(dt)
+            if render:
+                self.render()
+
+            for event in pygame.event.get():
+                self.event(event)
@@ -0,0 +1,80 @@
+from collections import deque
+
+import pygame
+
+
+class LiveInput:
+    # The real keyboard and mouse
+    @staticmethod
+    def advance(dt):
+        return []
+
+    @staticmethod
+    def keys():
+        return pygame.key.get_pressed()
+
+    @staticmethod
+    def mods():
+        return pygame.key.get_mods()
+
+    @staticmethod
+    def mouse_pos():
+        return pygame.mouse.get_pos()
+
+    @staticmethod
+    def mouse_buttons():
+        return pygame.mouse.get_pressed()
+
+
+class _Held(frozenset):
+    # Indexed by key like pygame.key.get_pressed()
+    __getitem__ = frozenset.__contains__
+
+
+class ScriptedInput:
+    # Stand-in for the keyboard and mouse when there aren't any. script is a list of
+    # (seconds, event) pairs using pygame's KEYDOWN, KEYUP, MOUSEMOTION, MOUSEBUTTONDOWN
+    # and MOUSEBUTTONUP events. advance() hands them out as their time comes round,
+    # and what keys() and friends report follows along with them.
+    def __init__(self, script=()):
+        self.time = 0
+        self._script = deque(sorted(script, key=lambda i: i[0]))
+
+        self._held = set()
+        self._mods = 0
+        self._pos = (0, 0)
+        self._buttons = [False, False, False]
+
+    def advance(self, dt):
+        self.time += dt
+
+        due = []
+        while self._script and self._script[0][0] <= self.time:
+            event = self._script.popleft()[1]
+            if event.type == pygame.KEYDOWN:
+                self._held.add(event.key)
+            elif event.type == pygame.KEYUP:
+                self._held.discard(event.key)
+            elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+                if event.button <= len(self._buttons):
+                    self._buttons[event.button - 1] = event.type == pygame.MOUSEBUTTONDOWN
+
+            if hasattr(event, 'mod'):
+                self._mods = event.mod
+            if hasattr(event, 'pos'):
+                self._pos = event.pos
+            due.append(event)
+
+        return due
+
+    def keys(self):
+        return _Held(self._held)
+
+    def mods(self):
+        return self._mods
+
+    def mouse_pos(self):
+        return self._pos
+
+    def mouse_buttons(self):
+        return tuple(self._buttons)
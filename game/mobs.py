@@ -0,0 +1,73 @@
+import numpy as np
+
+
+def _field(name):
+    def get(self):
+        return self._data[name][:self._n]
+
+    def set_(self, value):
+        self._data[name][:self._n] = value
+
+    return property(get, set_)
+
+
+class Mobs:
+    # Every animal in the world, stored as one numpy array per attribute so
+    # the whole population can be moved and culled in a handful of array ops.
+    # `kind` is an id into whatever palette of mob sprites the owner uses.
+    FIELDS = (
+        ('x', np.float64),
+        ('y', np.float64),
+        ('kind', np.uint8),
+        ('health', np.float64),
+        ('direction', np.int64),
+        ('speed', np.float64),
+        ('phase', np.int64),  # Set once per mob, for staggering work between them
+        ('last_slow', np.int64),  # The slow and med tick each was last updated on, -1 if never
+        ('last_med', np.int64),
+    )
+
+    x = _field('x')
+    y = _field('y')
+    kind = _field('kind')
+    health = _field('health')
+    direction = _field('direction')
+    speed = _field('speed')
+    phase = _field('phase')
+    last_slow = _field('last_slow')
+    last_med = _field('last_med')
+
+    def __init__(self, capacity=64):
+        self._n = 0
+        self._serial = 0  # Handed out as phases, so each run of mobs added spreads out evenly
+        self._data = {name: np.zeros(capacity, dtype) for name, dtype in self.FIELDS}
+
+    def __len__(self):
+        return self._n
+
+    def add(self, x, y, kind, health, direction, speed):
+        if self._n == len(self._data['x']):
+            for name, arr in self._data.items():
+                self._data[name] = np.concatenate((arr, np.zeros_like(arr)))
+
+        for name, value in zip(self._data, (x, y, kind, health, direction, speed)):
+            self._data[name][self._n] = value
+        self._data['phase'][self._n] = self._serial
+        self._data['last_slow'][self._n] = self._data['last_med'][self._n] = -1
+        self._serial += 1
+        self._n += 1
+
+    def keep(self, mask):
+        # Drop every mob where mask is False, keeping the rest in order
+        k = int(np.count_nonzero(mask))
+        for arr in self._data.values():
+            arr[:k] = arr[:self._n][mask]
+        self._n = k
+
+    def remove(self, indices):
+        mask = np.ones(self._n, dtype=bool)
+        mask[indices] = False
+        self.keep(mask)
+
+    def clear(self):
+        self._n = 0
@@ -0,0 +1,136 @@
+import numpy as np
+
+
+# Port of the 2D half of opensimplex's OpenSimplex, evaluating whole arrays of
+# points at once. Operation order is kept identical to the original so the
+# results come out bit-for-bit the same as OpenSimplex(seed).noise2d.
+STRETCH_CONSTANT_2D = -0.211324865405187
+SQUISH_CONSTANT_2D = 0.366025403784439
+NORM_CONSTANT_2D = 47
+
+GRADIENTS_2D = np.array((
+    5, 2, 2, 5,
+    -5, 2, -2, 5,
+    5, -2, 2, -5,
+    -5, -2, -2, -5,
+), dtype=np.int64)
+
+
+def overflow(x):
+    # Wrap a python int the way a signed 64 bit int would
+    return (x + 2 ** 63) % 2 ** 64 - 2 ** 63
+
+
+class OpenSimplex:
+    def __init__(self, seed=0):
+        perm = [0] * 256
+        source = list(range(256))
+        seed = overflow(seed * 6364136223846793005 + 1442695040888963407)
+        seed = overflow(seed * 6364136223846793005 + 1442695040888963407)
+        seed = overflow(seed * 6364136223846793005 + 1442695040888963407)
+        for i in range(255, -1, -1):
+            seed = overflow(seed * 6364136223846793005 + 1442695040888963407)
+            r = int((seed + 31) % (i + 1))
+            if r < 0:
+                r += i + 1
+            perm[i] = source[r]
+            source[r] = source[i]
+
+        self._perm = np.array(perm, dtype=np.int64)
+
+    def _extrapolate2d(self, xsb, ysb, dx, dy):
+        perm = self._perm
+        index = perm[(perm[xsb & 0xFF] + ysb) & 0xFF] & 0x0E
+        return GRADIENTS_2D[index] * dx + GRADIENTS_2D[index + 1] * dy
+
+    def _contribute(self, value, xsb, ysb, dx, dy):
+        attn = 2 - dx * dx - dy * dy
+        mask = attn > 0
+        if mask.any():
+            attn = attn[mask]
+            attn *= attn
+            value[mask] += attn * attn * self._extrapolate2d(xsb[mask], ysb[mask], dx[mask], dy[mask])
+
+    def noise2d_array(self, x, y):
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+
+        # Place input coordinates onto grid
+        stretch_offset = (x + y) * STRETCH_CONSTANT_2D
+        xs = x + stretch_offset
+        ys = y + stretch_offset
+
+        # Floor to get grid coordinates of rhombus super-cell origin
+        xsb = np.floor(xs).astype(np.int64)
+        ysb = np.floor(ys).astype(np.int64)
+
+        squish_offset = (xsb + ysb) * SQUISH_CONSTANT_2D
+        xb = xsb + squish_offset
+        yb = ysb + squish_offset
+
+        xins = xs - xsb
+        yins = ys - ysb
+        in_sum = xins + yins
+
+        dx0 = x - xb
+        dy0 = y - yb
+
+        value = np.zeros(x.shape)
+
+        # Contributions (1, 0) and (0, 1)
+        self._contribute(value, xsb + 1, ysb, dx0 - 1 - SQUISH_CONSTANT_2D, dy0 - 0 - SQUISH_CONSTANT_2D)
+        self._contribute(value, xsb, ysb + 1, dx0 - 0 - SQUISH_CONSTANT_2D, dy0 - 1 - SQUISH_CONSTANT_2D)
+
+        # Work out the extra vertex for each of the five regions a point can be in
+        lower = in_sum <= 1
+        zins = np.where(lower, 1 - in_sum, 2 - in_sum)
+        near_origin = np.where(lower, (zins > xins) | (zins > yins), (zins < xins) | (zins < yins))
+        x_major = xins > yins
+
+        regions = [
+            lower & near_origin & x_major,
+            lower & near_origin & ~x_major,
+            lower & ~near_origin,
+            ~lower & near_origin & x_major,
+            ~lower & near_origin & ~x_major,
+        ]
+        xsv_ext = np.select(regions, [xsb + 1, xsb - 1, xsb + 1, xsb + 2, xsb + 0], xsb)
+        ysv_ext = np.select(regions, [ysb - 1, ysb + 1, ysb + 1, ysb + 0, ysb + 2], ysb)
+        dx_ext = np.select(regions, [
+            dx0 - 1, dx0 + 1, dx0 - 1 - 2 * SQUISH_CONSTANT_2D,
+            dx0 - 2 - 2 * SQUISH_CONSTANT_2D, dx0 + 0 - 2 * SQUISH_CONSTANT_2D,
+        ], dx0)
+        dy_ext = np.select(regions, [
+            dy0 + 1, dy0 - 1, dy0 - 1 - 2 * SQUISH_CONSTANT_2D,
+            dy0 + 0 - 2 * SQUISH_CONSTANT_2D, dy0 - 2 - 2 * SQUISH_CONSTANT_2D,
+        ], dy0)
+
+        # Contribution (0, 0) or (1, 1)
+        xsb = np.where(lower, xsb, xsb + 1)
+        ysb = np.where(lower, ysb, ysb + 1)
+        dx0 = np.where(lower, dx0, dx0 - 1 - 2 * SQUISH_CONSTANT_2D)
+        dy0 = np.where(lower, dy0, dy0 - 1 - 2 * SQUISH_CONSTANT_2D)
+        self._contribute(value, xsb, ysb, dx0, dy0)
+
+        self._contribute(value, xsv_ext, ysv_ext, dx_ext, dy_ext)
+
+        return value / NORM_CONSTANT_2D
+
+    def noise2d(self, x, y):
+        return float(self.noise2d_array(x, y))
+
+    def fractal2d_array(self, x, y, octaves=1, persistence=0.5, lacunarity=2):
+        # fBm, normalised back into the range of a single octave
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        value = 0
+        amplitude = frequency = 1
+        total = 0
+        for _ in range(octaves):
+            value = value + self.noise2d_array(x * frequency, y * frequency) * amplitude
+            total += amplitude
+            amplitude *= persistence
+            frequency *= lacunarity
+
+        return value / total
+
+    def fractal2d(self, x, y, octaves=1, persistence=0.5, lacunarity=2):
+        return float(self.fractal2d_array(x, y, octaves, persistence, lacunarity))
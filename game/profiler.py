@@ -0,0 +1,119 @@
+from contextlib import contextmanager
+import time
+
+import numpy as np
+import pygame
+
+
+class Profiler:
+    # How long each phase of the last `size` frames took. Phases can nest, and a
+    # phase's time doesn't include any phases inside it, so the phases of a frame
+    # add up to (nearly) the whole frame and the biggest one is what to blame.
+    GRAPH_W = 240
+    GRAPH_H = 60
+    GRAPH_MAX = 1 / 20  # Frame time at the top of the graph
+    TARGET = 1 / 60
+
+    def __init__(self, size=240):
+        self.size = size
+        self.frames = 0
+
+        self._frame_t = np.zeros(size)
+        self._phases = {}
+        self._stack = []
+        self._last = None
+
+    def _slot(self):
+        return self.frames % self.size
+
+    @contextmanager
+    def phase(self, name):
+        self._stack.append([time.perf_counter(), 0])
+        try:
+            yield
+        finally:
+            start, inner = self._stack.pop()
+            taken = time.perf_counter() - start
+            if name not in self._phases:
+                self._phases[name] = np.zeros(self.size)
+            self._phases[name][self._slot()] += taken - inner
+            if self._stack:
+                self._stack[-1][1] += taken
+
+    def frame(self):
+        # Call once per frame, at the same point every time
+        now = time.perf_counter()
+        if self._last is not None:
+            self._frame_t[self._slot()] = now - self._last
+            self.frames += 1
+            for i in self._phases.values():
+                i[self._slot()] = 0
+        self._last = now
+
+    def _recent(self, arr):
+        # arr's finished frames, oldest first. The current slot is the frame in progress.
+        if self.frames < self.size:
+            return arr[:self.frames]
+        return np.roll(arr, -self._slot())[1:]
+
+    def frame_times(self):
+        return self._recent(self._frame_t)
+
+    def percentiles(self, *ps):
+        times = self.frame_times()
+        if not len(times):
+            return (0,) * len(ps)
+        return tuple(np.percentile(times, ps))
+
+    def phase_times(self):
+        return {name: self._recent(i) for name, i in self._phases.items()}
+
+    def worst(self):
+        # The phase that took longest in the slowest frame, and how long it took
+        times = self.frame_times()
+        if not len(times) or not self._phases:
+            return None, 0
+        n = int(times.argmax())
+        name, phase = max(self.phase_times().items(), key=lambda i: i[1][n])
+        return name, phase[n]
+
+    def report(self):
+        p50, p95, p99 = self.percentiles(50, 95, 99)
+        print('{} frames  p50 {:.2f}ms  p95 {:.2f}ms  p99 {:.2f}ms'.format(
+            len(self.frame_times()), p50 * 1000, p95 * 1000, p99 * 1000))
+
+        phases = sorted(self.phase_times().items(), key=lambda i: -i[1].mean())
+        for name, times in phases:
+            print(' {:<28} mean {:6.2f}ms  p95 {:6.2f}ms  max {:6.2f}ms'.format(
+                name, times.mean() * 1000, np.percentile(times, 95) * 1000, times.max() * 1000))
+
+        name, taken = self.worst()
+        if name is not None:
+            print('Slowest frame was mostly {} ({:.2f}ms)'.format(name, taken * 1000))
+
+    def draw(self, surface, font, right, top):
+        # Frame time graph with the percentiles and worst phase underneath, all lined up
+        # against right. font is a BMPFont. Returns the rect drawn over.
+        x, y = right - self.GRAPH_W, top
+        drawn = pygame.draw.rect(surface, (25, 25, 25), (x, y, self.GRAPH_W, self.GRAPH_H))
+
+        times = self.frame_times()[-self.GRAPH_W:]
+        for n, t in enumerate(times.tolist()):
+            h = min(self.GRAPH_H, round(t / self.GRAPH_MAX * self.GRAPH_H))
+            colour = (100, 200, 100) if t <= self.TARGET else (200, 200, 50) if t <= self.TARGET * 2 else (200, 50, 50)
+            pygame.draw.line(surface, colour, (x + n, y + self.GRAPH_H - 1), (x + n, y + self.GRAPH_H - h))
+        target = y + self.GRAPH_H - round(self.TARGET / self.GRAPH_MAX * self.GRAPH_H)
+        pygame.draw.line(surface, (200, 200, 200), (x, target), (x + self.GRAPH_W - 1, target))
+
+        p50, p95, p99 = self.percentiles(50, 95, 99)
+        lines = ['P50 {:.1f}  P95 {:.1f}  P99 {:.1f} MS'.format(p50 * 1000, p95 * 1000, p99 * 1000)]
+        name, taken = self.worst()
+        if name is not None:
+            lines.append('WORST {} {:.1f} MS'.format(name.replace('_', ' '), taken * 1000))
+
+        y += self.GRAPH_H + 4
+        for line in lines:
+            t = font.render(line, True)
+            drawn.union_ip(surface.blit(t, (right - t.get_width(), y)))
+            y += t.get_height() + 4
+        return drawn
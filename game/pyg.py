@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import pygame
 
 
@@ -23,16 +25,32 @@ class TileSheet:
 
 class BMPFont:
     KEY = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ .0123456789-?'
+    CACHE = 256  # Rendered strings to keep around
 
     def __init__(self, path, tw, th, scale=1, pad=0):
         self.ss = TileSheet(path, tw, th, scale, pad)
 
+        # (light, dark) glyph for every character we can draw, in either case
+        self._glyphs = {}
+        for n, i in enumerate(self.KEY):
+            glyphs = self.ss.get_at(n % 16, n // 16), self.ss.get_at(n % 16, n // 16 + 8)
+            self._glyphs[i] = self._glyphs[i.lower()] = glyphs
+        self._cache = OrderedDict()
+
     def render(self, text, dark=False):
-        text = [i.upper() for i in text if i.upper() in self.KEY]
-        surf = pygame.Surface((len(text) * self.ss.tw, self.ss.th))
+        # The same text gets the same surface back, so copy it before changing it
+        key = text, bool(dark)
+        surf = self._cache.get(key)
+        if surf is not None:
+            self._cache.move_to_end(key)
+            return surf
+
+        glyphs = [self._glyphs[i][key[1]] for i in text if i in self._glyphs]
+        surf = pygame.Surface((len(glyphs) * self.ss.tw, self.ss.th))
         surf.set_colorkey((255, 0, 255))
-        for n, i in enumerate(text):
-            i = self.KEY.index(i)
-            surf.blit(self.ss.get_at(i % 16, i // 16 + (8 if dark else 0)), (n * self.ss.tw, 0))
+        surf.blits([(i, (n * self.ss.tw, 0)) for n, i in enumerate(glyphs)], False)
 
+        self._cache[key] = surf
+        if len(self._cache) > self.CACHE:
+            self._cache.popitem(False)
         return surf
@@ -8,8 +8,8 @@ class LoadingScene(Scene):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.font = BMPFont(self.path('tiles/FONT.png'), 16, 16, 2)
-        self.font2 = BMPFont(self.path('tiles/FONT.png'), 16, 16, 1)
+        self.font = BMPFont(self.path('tiles/font.png'), 16, 16, 2)
+        self.font2 = BMPFont(self.path('tiles/font.png'), 16, 16, 1)
 
         self.message = ''
         self.progress = 0
@@ -4,6 +4,8 @@ import os
 class Scene:
     ASSETS = '../../assets'
 
+    dirty = None  # Screen rects the last render changed, or None for all of it
+
     def __init__(self, game, start_active=False):
         self._active = False
         self.active = start_active
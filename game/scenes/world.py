@@ -1,13 +1,20 @@
 import threading
 import random
 import math
-import time
 
 import pygame
+import numpy as np
 
-from typing import Optional, Tuple, List, Union
+from typing import Optional, Tuple, List, Union, Dict
 from game.pyg import TileSheet, BMPFont
-from opensimplex import OpenSimplex
+from game.noise import OpenSimplex
+from game.chunks import ChunkCache
+from game.tiles import Palette, Frontier, touching, neighbours
+from game.spatial import ItemGrid, SampleSet
+from game.mobs import Mobs
+from game.crafting import RecipeBook
+from game.flow import distances, flow_field
+from game.scheduler import Scheduler
 from .scene import Scene
 
 
@@ -69,6 +76,7 @@ class GameScene(Scene):
                'Hold H for help'
 
     # World gen
+    NOISE = OpenSimplex  # Anything with OpenSimplex's fractal2d/fractal2d_array
     OCTAVES = 2
 
     DUNGEON = -0.3
@@ -84,17 +92,24 @@ class GameScene(Scene):
     MAX_HEALTH = 10
 
     # World
-    X_CHUNKS = 3
-    Y_CHUNKS = 3
+    X_CHUNKS = 6
+    Y_CHUNKS = 6
 
-    CHUNK_W = 32
-    CHUNK_H = 32
+    CHUNK_W = 16
+    CHUNK_H = 16
+    CHUNK_BUDGET = 96 * 2 ** 20  # Bytes of chunk surfaces to hang on to
 
     WIDTH = X_CHUNKS * CHUNK_W
     HEIGHT = Y_CHUNKS * CHUNK_H
 
     ALTAR_BONUS = 0.25
 
+    MED_TICK = 0.1  # Seconds per animal movement step
+    SLOW_TICK = 1
+    SUPER_SLOW_TICK = 2
+    LOD_STEPS = 4  # Animals far from the player update this many times less often
+    FLOW_MARGIN = 8  # Tiles past the furthest sight range to look for routes around things
+
     # Tiles
     WATER = 0, 0
     WATER_M = 4, 1
@@ -234,6 +249,7 @@ class GameScene(Scene):
         (STICK, STICK): PLANK_F_DROP,
         (PLANK_F_DROP, PLANK_F_DROP): PLANK_W_DROP,
     }
+    RECIPE_BOOK = RecipeBook(RECIPIES)
     SACRIFICES = {
         STICK: 0.05,
         SAND_DROP: 0.1,
@@ -334,6 +350,34 @@ class GameScene(Scene):
         FLOWERS_B, FLOWERS_C, FLOWERS_W
     )
 
+    # Height bands, paired with the tile each one generates
+    TERRAIN_H = (
+        DUNGEON, DEEP, MEDIUM, SEA, BEACH, STONE_H, TOP_H
+    )
+    TERRAIN = (
+        WET_ROCK, WATER_D, WATER_M, WATER, SAND, GRASS, HIGH_STONE, SKY_STONE
+    )
+    # Everything that can end up on the ground or overlay layer of a chunk. TERRAIN
+    # comes first so a height band's index is also its tile id.
+    GROUND = Palette(TERRAIN + (
+        MUD, ROCK_S, ROCK_R, TILE, PLANK_F
+    ))
+    DECOR = Palette((
+        None, TREE, FLOWERS_C, FLOWERS_B, FLOWERS_W, VINES, PLANK_W, ROCK_WALL,
+        CANDLE, CANDLE_L, CANDLE_G, ALTAR, GEM_WALL
+    ))
+
+    # Ground tile properties, indexed by tile id
+    TILE_SPEED = GROUND.table(SPEED, 1)
+    TILE_DIG_T = GROUND.table(DIG_T)
+    TILE_HUNGER = GROUND.table(HUNGER)
+    TILE_PROGRESSION = GROUND.remap(PROGRESSION)
+    TILE_DROPS = GROUND.lookup(DROPS)
+
+    IS_WATER = GROUND.mask(WATER, WATER_M, WATER_D)
+    IS_ROCK = GROUND.mask(ROCK_R, ROCK_S)
+    IS_PLACEABLE = GROUND.mask(*PLACEABLE)
+
     # Waves 'n stuff
     WAVE_TIMERS = (
         1, 2, 3, 3, 3, 3, 3, 2
@@ -372,6 +416,20 @@ class GameScene(Scene):
         GEM_S: 0,
     }
 
+    # Mob properties, indexed by the mob kinds stored in self.animals
+    MOBS = Palette((
+        PIG, Z_PIG, EYE, ANGEL, SLIME, VAMPIRE
+    ))
+    MOB_HEALTH = MOBS.table(A_HEALTH)
+    IS_FLOATING = MOBS.mask(*FLOATING)
+    IS_HOSTILE = MOBS.mask(*HOSTILE)
+    IS_BREAKER = MOBS.mask(*BREAKERS)
+    IS_NO_ROT = MOBS.mask(*NO_ROT)
+    MOB_V_RANGE = MOBS.table(V_RANGE)
+    MOB_RANGE = MOBS.table(RANGE)
+    MOB_ATTACK = MOBS.table(ATTACK)
+    STEPS = np.array(tuple(DIRECTION.values()))
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -386,25 +444,43 @@ class GameScene(Scene):
         self.assets_s = TileSheet(self.path('tiles/ui.png'), 8, 8, scale)
         self.font = BMPFont(self.path('tiles/font.png'), 16, 16, 1)
         self.font2 = BMPFont(self.path('tiles/font.png'), 16, 16, 2)
-
-        self.world: List[List[Tuple]] = [
-            [self.GRASS for _ in range(self.HEIGHT)]
-            for _ in range(self.WIDTH)
-        ]
-        self.entities: List[List[int, int, Tuple[int, int]]] = [
+        # Sprite for each MOBS id facing each DIRECTION
+        self.mob_sprites = [[self.ground.get_at(*j, rot=0 if self.IS_NO_ROT[i] else d * 90) for d in range(4)]
+                            for i, j in enumerate(self.MOBS.tiles)]
+
+        # Tile ids into GROUND and DECOR respectively
+        self.world: np.ndarray = np.full((self.WIDTH, self.HEIGHT), self.GROUND.id(self.GRASS), np.uint8)
+        self.decor: np.ndarray = np.zeros((self.WIDTH, self.HEIGHT), np.uint8)
+        # Tiles that could erode next slow tick
+        self.erosion = Frontier(self.WIDTH, self.HEIGHT)
+        self.entities: ItemGrid = ItemGrid([
             [5, 5, self.TABLE]
-        ]
-        self.g_entities: List[List[Union[int, Tuple[int, int]]]] = []
-        self.animals: List[List[int, int, Tuple[int, int], int, int]] = []
-        # x, y, [tx, ty], health, direction
+        ])
+        self.g_entities: Dict[Tuple[int, int], List[Union[int, Tuple[int, int]]]] = {}
+        # (x, y): [x, y, [tx, ty], health]
+        self.solid: np.ndarray = np.zeros((self.WIDTH, self.HEIGHT), bool)
+        # Where g_entities are, for checking many tiles at once
+        self.flow: np.ndarray = np.full((self.WIDTH, self.HEIGHT), -1, np.int8)
+        # Which DIRECTION takes hostile walkers towards the player from each tile
+        self.flow_key = None  # (goal x, goal y, reach) flow was last worked out for
+        self.flow_stale = False  # Whether the map has changed since
+        self.spawnable = SampleSet()
+        # (x, y) of every PLACEABLE tile without a g_entity on it
+        self.animals = Mobs()
 
         self.chat = []
 
-        self.chunks = []
-        self.o_chunks = []
+        self.chunks = ChunkCache(self.build_chunk, self.CHUNK_BUDGET)
+        # For the dirty rect renderer (Game.DIRTY)
+        self.background = self.bg_screen = self.bg_scroll = None
+        self.bg_state = set()
+        self.changed_tiles = set()  # Tiles set since the last frame
+        self.drawn = []  # Screen rects of everything drawn over the world last frame
+        self._ground_px = self._decor_px = None
         random.seed()
         self.scroll = [0, 0]
         self.pos = [0, 0]
+        self.last_scroll = self.last_pos = [0, 0]  # As of the tick before
         self.last_tile = None
 
         self.health = self.MAX_HEALTH
@@ -415,12 +491,18 @@ class GameScene(Scene):
 
         self.flash = True
         self.m_lock = False
-        pygame.time.set_timer(pygame.USEREVENT, 1000)
-        pygame.time.set_timer(pygame.USEREVENT + 1, 2000)
 
-        self.animal_thread = None
+        self.med_timer = 0
+        self.med_ticks = self.slow_ticks = 0
+        self.time = 0  # Seconds of game time
+
+        # Half a tick out of step, so the two heavy ticks never come due together
+        self.scheduler = Scheduler()
+        self.scheduler.every(self.SLOW_TICK, self.slow_tick, phase=self.SLOW_TICK / 2, jitter=0.05, heavy=True)
+        self.scheduler.every(self.SUPER_SLOW_TICK, self.super_slow_tick, jitter=0.05, heavy=True)
 
         self.hotbar_2: List[Optional[List[Union[List[int, int], int]]]] = [None] * 10
+        self.hud_key, self.hud = None, []  # What hud_layers last drew, and what it drew
         self.hotbar: List[Optional[List[Union[List[int, int], int]]]] = [None] * 10
         self.altars = 0
         self.hb_p = 0
@@ -447,115 +529,209 @@ class GameScene(Scene):
         self.pos = [random.randint(10, self.WIDTH - 20) * self.ground.tw,
                     random.randint(10, self.HEIGHT - 20) * self.ground.th]
         self.scroll = [0, 0]
+        self.last_pos, self.last_scroll = list(self.pos), list(self.scroll)
         self.wave = self.wave_timer = 0
+        self.med_timer = 0
         self.text_ol = []
 
-    def start(self):
+    def _scene_went_active(self):
+        # Whatever's on screen isn't ours
+        self.bg_scroll = None
+
+    def start(self, threaded=None):
         self.active = False
         self.reset()
 
+        if threaded is None:
+            # Headless runs have to come back from a death on the same tick every time
+            threaded = not self._game.HEADLESS
+        if not threaded:
+            self.grow()
+            return self
+
         t = threading.Thread(target=self.grow)
         t.daemon = True
         t.start()
 
-        self.animal_thread = threading.Thread(target=self.med_tick)
-        self.animal_thread.daemon = True
-        self.animal_thread.start()
-
         return self
 
     def set_at(self, x, y, tile):
-        self.world[x][y] = tile
-        cx, cy = int(x // self.CHUNK_W), int(y // self.CHUNK_H)
-        rel_x, rel_y = x % self.CHUNK_W, y % self.CHUNK_H
-        self.chunks[cx][cy].blit(self.ground.get_at(*tile), (rel_x * self.ground.tw, rel_y * self.ground.th))
+        self.world[x, y] = self.GROUND.id(tile)
+        self.erosion.touch(x, y)
+        self.update_spawnable(x, y)
+        self.flow_stale = True
+        if self._game.DIRTY:
+            self.changed_tiles.add((x, y))
+        chunk = self.chunks.peek(int(x // self.CHUNK_W), int(y // self.CHUNK_H))
+        if chunk is not None:
+            rel_x, rel_y = x % self.CHUNK_W, y % self.CHUNK_H
+            chunk[0].blit(self.ground.get_at(*tile), (rel_x * self.ground.tw, rel_y * self.ground.th))
+
+    def set_tiles(self, xs, ys, tile):
+        # set_at for many tiles at once
+        self.world[xs, ys] = self.GROUND.id(tile)
+        self.flow_stale = True
+        surf = self.ground.get_at(*tile)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self.erosion.touch(x, y)
+            self.update_spawnable(x, y)
+            if self._game.DIRTY:
+                self.changed_tiles.add((x, y))
+            chunk = self.chunks.peek(x // self.CHUNK_W, y // self.CHUNK_H)
+            if chunk is not None:
+                chunk[0].blit(surf, ((x % self.CHUNK_W) * self.ground.tw, (y % self.CHUNK_H) * self.ground.th))
+
+    def update_spawnable(self, x, y):
+        key = int(x), int(y)
+        if self.IS_PLACEABLE[self.world[key]] and not self.solid[key]:
+            self.spawnable.add(key)
+        else:
+            self.spawnable.discard(key)
+
+    def spawn_tile(self, away=0, tries=100):
+        # A random spawnable tile whose corner is at least away pixels from the player's,
+        # or None if we can't find one
+        for _ in range(tries if self.spawnable else 0):
+            x, y = self.spawnable.sample()
+            if (x * self.ground.tw - self.pos[0]) ** 2 + (y * self.ground.th - self.pos[1]) ** 2 >= away ** 2:
+                return x, y
+        return None
 
     def grow(self, seed=None):
         self._game.scenes[-1].message = 'Generating world seed'
         self._game.scenes[-1].progress = 50
-        self.g_entities = []
-        self.entities = []
-        self.animals = []
-
-        self.chunks = [
-            [
-                pygame.Surface((self.CHUNK_W * self.ground.tw, self.CHUNK_H * self.ground.th))
-                for _ in range(self.Y_CHUNKS)
-            ] for _ in range(self.X_CHUNKS)
-        ]
-        # noinspection PyArgumentList
-        self.o_chunks = [
-            [
-                pygame.Surface((self.CHUNK_W * self.ground.tw, self.CHUNK_H * self.ground.th)).convert_alpha()
-                for _ in range(self.Y_CHUNKS)
-            ] for _ in range(self.X_CHUNKS)
-        ]
-        for i in self.o_chunks:
-            for j in i:
-                j.fill((0, 0, 0, 0))
+        self.g_entities = {}
+        self.entities = ItemGrid()
+        self.animals.clear()
+
+        self.chunks.clear()
+        # Reuse the grids where we can, as the console has hold of them
+        if self.world.shape != (self.WIDTH, self.HEIGHT):
+            self.world = np.zeros((self.WIDTH, self.HEIGHT), np.uint8)
+            self.decor = np.zeros((self.WIDTH, self.HEIGHT), np.uint8)
+            self.solid = np.zeros((self.WIDTH, self.HEIGHT), bool)
+            self.flow = np.full((self.WIDTH, self.HEIGHT), -1, np.int8)
+        self.decor[...] = 0
+        self.solid[...] = False
+        self.flow[...] = -1
+        self.flow_key = None
 
         px, py = self.pos[0] // self.ground.tw, self.pos[1] // self.ground.th
         if seed is None:
             while True:
                 seed = random.random()
-                gen = OpenSimplex(seed=round(seed * 100000))
+                gen = self.NOISE(seed=round(seed * 100000))
 
-                if self.TREE_H > gen.noise2d(px / self.WIDTH, py / self.HEIGHT) > self.SEA:
+                if self.TREE_H > gen.fractal2d(px / self.WIDTH, py / self.HEIGHT, self.OCTAVES) > self.SEA:
                     # Spawn near a beach
                     break
         else:
-            gen = OpenSimplex(seed=round(seed * 100000))
+            gen = self.NOISE(seed=round(seed * 100000))
 
         self._game.scenes[-1].message = 'Generating world surfaces'
-        for x, row in enumerate(self.world):
-            self._game.scenes[-1].progress = (x / len(self.world)) * 100
-
-            for y, p in enumerate(row):
-                v = gen.noise2d(x / self.WIDTH, y / self.HEIGHT)
-
-                self.set_at(x, y,
-                            self.WET_ROCK if v < self.DUNGEON else
-                            self.WATER_D if v < self.DEEP else
-                            self.WATER_M if v < self.MEDIUM else
-                            self.WATER if v < self.SEA else
-                            self.SAND if v < self.BEACH else
-                            self.GRASS if v < self.STONE_H else
-                            self.HIGH_STONE if v < self.TOP_H else
-                            self.SKY_STONE)
-
-                if (x, y) != (px, py):
-                    if self.STONE_H > v > self.TREE_H:
-                        if random.random() > 1 - v:
-                            self.set_g(x, y, self.TREE)
-                        elif random.random() > 0.85:
-                            self.set_g(x, y, random.choice(self.FLOWERS), True)
-                    elif self.STONE_H < v and random.random() * 2 < v:
-                        self.set_g(x, y, self.VINES, True)
-                    elif self.SEA < v:
-                        if random.random() > 0.95:
-                            self.animals.append([x * self.ground.tw, y * self.ground.th, self.PIG,
-                                                 self.A_HEALTH[self.PIG], random.randint(0, 3), random.randint(32, 64)])
+        xs, ys = np.meshgrid(np.arange(self.WIDTH) / self.WIDTH, np.arange(self.HEIGHT) / self.HEIGHT, indexing='ij')
+        heights = gen.fractal2d_array(xs, ys, self.OCTAVES)
+        terrain = np.digitize(heights, self.TERRAIN_H)
+        self.world[...] = terrain
+        self.erosion = Frontier(self.WIDTH, self.HEIGHT)
+        self.erosion.touch_all(self.IS_ROCK[self.world])
+
+        # Only land can hold decorations, so there's no need to visit the sea
+        self._game.scenes[-1].message = 'Decorating world'
+        land = np.argwhere(heights > self.SEA).tolist()
+        for n, (x, y) in enumerate(land):
+            self._game.scenes[-1].progress = (n / len(land)) * 100
+            v = heights[x, y]
+
+            if (x, y) != (px, py):
+                if self.STONE_H > v > self.TREE_H:
+                    if random.random() > 1 - v:
+                        self.set_g(x, y, self.TREE)
+                    elif random.random() > 0.85:
+                        self.set_g(x, y, random.choice(self.FLOWERS), True)
+                elif self.STONE_H < v and random.random() * 2 < v:
+                    self.set_g(x, y, self.VINES, True)
+                elif self.SEA < v:
+                    if random.random() > 0.95:
+                        self.animals.add(x * self.ground.tw, y * self.ground.th, self.MOBS.id(self.PIG),
+                                         self.A_HEALTH[self.PIG], random.randint(0, 3), random.randint(32, 64))
+
+        spawnable = self.IS_PLACEABLE[self.world] & ~self.solid
+        self.spawnable = SampleSet((x, y) for x, y in np.argwhere(spawnable).tolist())
 
         self.active = True
 
+    def tile_pixels(self, tiles, alpha=False):
+        # [tile, x, y, rgb(a)] for each of tiles. Tiles go onto a blank chunk-format surface
+        # first so we get exactly what blitting straight into a chunk would.
+        pixels = []
+        for tile in tiles:
+            # noinspection PyArgumentList
+            surf = pygame.Surface((self.ground.tw, self.ground.th)).convert_alpha() if alpha else \
+                pygame.Surface((self.ground.tw, self.ground.th))
+            if alpha:
+                surf.fill((0, 0, 0, 0))
+            if tile is not None:
+                surf.blit(self.ground.get_at(*tile), (0, 0))
+            rgb = pygame.surfarray.array3d(surf)
+            if alpha:
+                rgb = np.dstack((rgb, pygame.surfarray.array_alpha(surf)))
+            pixels.append(rgb)
+        return np.array(pixels)
+
+    @staticmethod
+    def raster(surface, tiles):
+        # Fill a surface from a [tx, ty, x, y, rgb(a)] block of tile pixels
+        w, h, tw, th, d = tiles.shape
+        tiles = tiles.transpose(0, 2, 1, 3, 4).reshape(w * tw, h * th, d)
+        pygame.surfarray.pixels3d(surface)[...] = tiles[..., :3]
+        if d == 4:
+            pygame.surfarray.pixels_alpha(surface)[...] = tiles[..., 3]
+
+    def build_chunk(self, cx, cy):
+        if self._ground_px is None:
+            self._ground_px = self.tile_pixels(self.GROUND)
+            self._decor_px = self.tile_pixels(self.DECOR, True)
+
+        xs = slice(cx * self.CHUNK_W, (cx + 1) * self.CHUNK_W)
+        ys = slice(cy * self.CHUNK_H, (cy + 1) * self.CHUNK_H)
+        size = self.CHUNK_W * self.ground.tw, self.CHUNK_H * self.ground.th
+        # noinspection PyArgumentList
+        chunk = pygame.Surface(size), pygame.Surface(size).convert_alpha()
+        self.raster(chunk[0], self._ground_px[self.world[xs, ys]])
+        self.raster(chunk[1], self._decor_px[self.decor[xs, ys]])
+
+        return chunk
+
     def set_g(self, x, y, type_, passive=False):
         health = self.HEALTH.get(type_, -1)
-        cx, cy = int(x // self.CHUNK_W), int(y // self.CHUNK_H)
+        chunk = self.chunks.peek(int(x // self.CHUNK_W), int(y // self.CHUNK_H))
         xo, yo = (x % self.CHUNK_W) * self.ground.tw, (y % self.CHUNK_H) * self.ground.th
         if type_ is None:
-            for i in self.g_entities:
-                if (i[0], i[1]) == (x, y):
-                    self.g_entities.remove(i)
-                    pygame.draw.rect(self.o_chunks[cx][cy], (0, 0, 0, 0),
-                                     (xo, yo, *self.ground.get_at(*i[2]).get_size()))
-                    break
-            else:
-                pygame.draw.rect(self.o_chunks[cx][cy], (0, 0, 0, 0),
-                                 (xo, yo, self.ground.tw, self.ground.th))
+            self.g_entities.pop((x, y), None)
+            self.solid[x, y] = False
+            if chunk is not None:
+                pygame.draw.rect(chunk[1], (0, 0, 0, 0), (xo, yo, self.ground.tw, self.ground.th))
         else:
             if not passive:
-                self.g_entities.append([x, y, type_, health])
-            self.o_chunks[cx][cy].blit(self.ground.get_at(*type_), (xo, yo))
+                self.g_entities[(x, y)] = [x, y, type_, health]
+                self.solid[x, y] = True
+            if chunk is not None:
+                # Whatever was here is gone from decor, so it has to go from the chunk too
+                pygame.draw.rect(chunk[1], (0, 0, 0, 0), (xo, yo, self.ground.tw, self.ground.th))
+                chunk[1].blit(self.ground.get_at(*type_), (xo, yo))
+        self.decor[x, y] = self.DECOR.id(type_)
+        self.update_spawnable(x, y)
+        self.flow_stale = True
+        if self._game.DIRTY:
+            self.changed_tiles.add((x, y))
+
+    def g_touching(self, rect):
+        # g_entities overlapping a rect in world pixels, found by looking up the tiles under it
+        for x in range(max(0, rect.left // self.ground.tw), min(self.WIDTH, (rect.right - 1) // self.ground.tw + 1)):
+            for y in range(max(0, rect.top // self.ground.th), min(self.HEIGHT, (rect.bottom - 1) // self.ground.th + 1)):
+                if (x, y) in self.g_entities:
+                    yield self.g_entities[(x, y)]
 
     def event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -592,10 +768,6 @@ class GameScene(Scene):
             elif event.key == pygame.K_x:
                 if self.dual_hb:
                     self.hotbar, self.hotbar_2 = self.hotbar_2, self.hotbar
-        elif event.type == pygame.USEREVENT:
-            self.slow_tick()
-        elif event.type == pygame.USEREVENT + 1:
-            self.super_slow_tick()
         elif event.type == pygame.MOUSEBUTTONDOWN:
             if event.button == 1:
                 self.click(event.pos)
@@ -635,6 +807,7 @@ class GameScene(Scene):
 
         xp, yp = pos[0] - self.scroll[0], pos[1] - self.scroll[1]
         tx, ty = int(xp // self.ground.tw), int(yp // self.ground.th)
+        tile = self.GROUND[self.world[tx, ty]]
         used = 0
 
         if item[0] == self.APPLE:
@@ -643,19 +816,18 @@ class GameScene(Scene):
                 self.hunger = min(self.hunger, self.MAX_HUNGER)
                 used = 1
         elif item[0] == self.PIG_MEAT:
-            for i in self.g_entities:
-                if i[2] == self.ALTAR and i[0] == tx and i[1] == ty:
-                    i[3] -= 5
-                    if i[3] <= 0:
-                        self.set_g(i[0], i[1], None)
-                        self.altars -= 1
-                    self.damage_player(1)
-                    self.hunger = max(self.hunger, self.hunger - 3)
-                    self.do_chat('A zombie pig has appeared.')
-                    self.animals.append([tx * self.ground.tw, ty * self.ground.th, self.Z_PIG,
-                                         self.A_HEALTH[self.Z_PIG], random.randint(0, 3), random.randint(64, 128)])
-                    used = 1
-                    break
+            i = self.g_entities.get((tx, ty))
+            if i is not None and i[2] == self.ALTAR:
+                i[3] -= 5
+                if i[3] <= 0:
+                    self.set_g(i[0], i[1], None)
+                    self.altars -= 1
+                self.damage_player(1)
+                self.hunger = max(self.hunger, self.hunger - 3)
+                self.do_chat('A zombie pig has appeared.')
+                self.animals.add(tx * self.ground.tw, ty * self.ground.th, self.MOBS.id(self.Z_PIG),
+                                 self.A_HEALTH[self.Z_PIG], random.randint(0, 3), random.randint(64, 128))
+                used = 1
             else:
                 if self.hunger < self.MAX_HUNGER:
                     self.hunger += 1
@@ -667,51 +839,47 @@ class GameScene(Scene):
                 self.health = min(self.health, self.MAX_HEALTH)
                 used = 1
         elif item[0] == self.SAND_DROP:
-            if self.world[tx][ty] in (self.ROCK_S, self.ROCK_R, self.WATER):
+            if tile in (self.ROCK_S, self.ROCK_R, self.WATER):
                 self.set_at(tx, ty, self.SAND)
                 used = 1
-            elif self.world[tx][ty] == self.WATER_M:
+            elif tile == self.WATER_M:
                 self.set_at(tx, ty, self.WATER)
                 used = 1
-            elif self.world[tx][ty] == self.WATER_D:
+            elif tile == self.WATER_D:
                 self.set_at(tx, ty, self.WATER_M)
                 used = 1
         elif item[0] == self.DIRT_DROP:
-            if self.world[tx][ty] in (self.ROCK_S, self.ROCK_R, self.WATER):
+            if tile in (self.ROCK_S, self.ROCK_R, self.WATER):
                 self.set_at(tx, ty, self.MUD)
                 used = 1
-            elif self.world[tx][ty] == self.WATER_M:
+            elif tile == self.WATER_M:
                 self.set_at(tx, ty, self.WATER)
                 used = 1
-            elif self.world[tx][ty] == self.WATER_D:
+            elif tile == self.WATER_D:
                 self.set_at(tx, ty, self.WATER_M)
                 used = 1
         elif item[0] == self.RUBBLE:
-            if self.world[tx][ty] in (self.ROCK_S, self.ROCK_R):
+            if tile in (self.ROCK_S, self.ROCK_R):
                 self.set_at(tx, ty, self.TILE)
                 used = 1
-            elif self.world[tx][ty] in (self.MUD, self.GRASS, self.SAND):
+            elif tile in (self.MUD, self.GRASS, self.SAND) and (tx, ty) not in self.g_entities:
                 self.set_g(tx, ty, self.ROCK_WALL)
                 used = 1
         elif item[0] == self.PLANK_F_DROP:
-            if self.world[tx][ty] in (self.ROCK_S, self.ROCK_R):
+            if tile in (self.ROCK_S, self.ROCK_R):
                 self.set_at(tx, ty, self.PLANK_F)
                 used = 1
         elif item[0] == self.PLANK_W_DROP:
-            if self.world[tx][ty] in (self.MUD, self.GRASS):
+            if tile in (self.MUD, self.GRASS) and (tx, ty) not in self.g_entities:
                 self.set_g(tx, ty, self.PLANK_W)
                 used = 1
         # Standard placeable items
         elif item[0] in (self.CANDLE, self.CANDLE_G, self.ALTAR, self.GEM_WALL):
-            if self.world[tx][ty] in self.PLACEABLE:
-                for i in self.g_entities:
-                    if tuple(i[0:2]) == (tx, ty):
-                        break
-                else:
-                    self.set_g(tx, ty, item[0])
-                    if item[0] == self.ALTAR:
-                        self.altars += 1
-                    used = 1
+            if self.IS_PLACEABLE[self.world[tx, ty]] and (tx, ty) not in self.g_entities:
+                self.set_g(tx, ty, item[0])
+                if item[0] == self.ALTAR:
+                    self.altars += 1
+                used = 1
 
         if used:
             item[1] -= used
@@ -719,28 +887,18 @@ class GameScene(Scene):
                 self.hotbar[index] = None
 
     def super_slow_tick(self):
-        world_copy = [list(i) for i in self.world]
-
-        for x, row in enumerate(world_copy):
-            for y, p in enumerate(row):
-                if p == self.MUD:
-                    if ((y > 0 and row[y - 1] == self.GRASS) or (y < len(row) - 1 and row[y + 1] == self.GRASS) or
-                            (x > 0 and world_copy[x - 1][y] == self.GRASS) or
-                            (x < len(world_copy) - 1 and world_copy[x + 1][y] == self.GRASS)):
-                        if random.random() > 0.85:
-                            self.set_at(x, y, self.GRASS)
-
-        if random.random() > 0.9:
+        # Mud next to grass has a chance to grow over
+        grass = self.world == self.GROUND.id(self.GRASS)
+        xs, ys = np.nonzero((self.world == self.GROUND.id(self.MUD)) & touching(grass))
+        grow = np.random.random(len(xs)) > 0.85
+        self.set_tiles(xs[grow], ys[grow], self.GRASS)
+
+        tile = self.spawn_tile() if random.random() > 0.9 else None
+        if tile is not None:
             # Spawn pig
-            ge = [(int(x), int(y)) for x, y, _, __ in self.g_entities]
-            while True:
-                x = random.randint(0, self.WIDTH - 1)
-                y = random.randint(0, self.HEIGHT - 1)
-                if self.world[x][y] in self.PLACEABLE:
-                    if (x, y) not in ge:
-                        break
-            self.animals.append([x * self.ground.tw, y * self.ground.th, self.PIG,
-                                 self.A_HEALTH[self.PIG], random.randint(0, 3), random.randint(32, 64)])
+            x, y = tile
+            self.animals.add(x * self.ground.tw, y * self.ground.th, self.MOBS.id(self.PIG),
+                             self.A_HEALTH[self.PIG], random.randint(0, 3), random.randint(32, 64))
 
         self.health = min(self.health + self.altars * self.ALTAR_BONUS, self.MAX_HEALTH)
 
@@ -750,117 +908,200 @@ class GameScene(Scene):
         if self.hunger <= 0:
             self.damage_player(0.2)
 
-        world_copy = [list(i) for i in self.world]
-
-        water = (self.WATER, self.WATER_M, self.WATER_D)
-        for x, row in enumerate(world_copy):
-            for y, p in enumerate(row):
-                if p in (self.ROCK_R, self.ROCK_S):
-                    if ((y > 0 and row[y - 1] in water) or (y < len(row) - 1 and row[y + 1] in water) or
-                            (x > 0 and world_copy[x - 1][y] in water) or
-                            (x < len(world_copy) - 1 and world_copy[x + 1][y] in water)):
-                        self.set_at(x, y, self.WATER)
-
-        for i in list(self.animals):
-            do_rand = True
-            if i[2] in self.HOSTILE:
-                dist = math.sqrt((self.pos[0] - i[0]) ** 2 + (self.pos[1] - i[1]) ** 2)
-                # noinspection PyTypeChecker
-                if dist < self.ground.tw * self.V_RANGE[i[2]]:
-                    dx, dy = self.pos[0] - i[0], self.pos[1] - i[1]
-                    if abs(dx) > abs(dy):
-                        i[4] = 3 if dx > 0 else 1
-                    else:
-                        i[4] = 2 if dy > 0 else 0
-                    do_rand = False
+        # Rock next to water erodes. Only tiles near a change since last time can flip.
+        with self._game.profiler.phase('GameScene.erosion'):
+            xs, ys = self.erosion.take()
+            eroded = self.IS_ROCK[self.world[xs, ys]] & neighbours(self.world, xs, ys, self.IS_WATER)
+            for x, y in zip(xs[eroded].tolist(), ys[eroded].tolist()):
+                self.set_at(x, y, self.WATER)
+
+        with self._game.profiler.phase('GameScene.flow'):
+            self.update_flow()
+
+        self.slow_ticks += 1
+        m = self.animals
+        a, scale = self.lod(self.slow_ticks, 'last_slow')
+        kind = m.kind[a]
+
+        # Hostiles that can see the player head for them, and anything in range gets a hit in
+        hostile = self.IS_HOSTILE[kind]
+        dx, dy = self.pos[0] - m.x[a], self.pos[1] - m.y[a]
+        dist = dx ** 2 + dy ** 2
+        seen = hostile & (dist < (self.ground.tw * self.MOB_V_RANGE[kind]) ** 2)
+        m.direction[a[seen]] = np.where(np.abs(dx) > np.abs(dy), np.where(dx > 0, 3, 1), np.where(dy > 0, 2, 0))[seen]
+
+        hits = hostile & (dist < (self.ground.tw * self.MOB_RANGE[kind]) ** 2)
+        if hits.any():
+            self.damage_player(float(self.MOB_ATTACK[kind[hits]].sum()) / self.armour)
+
+        turn = a[~seen & (np.random.random(len(a)) > 0.8 ** scale)]
+        m.direction[turn] = (m.direction[turn] + np.random.randint(-1, 2, len(turn))) % 4
+
+        # Walkers slowly drown
+        tx, ty = (m.x[a] // self.ground.tw).astype(int), (m.y[a] // self.ground.th).astype(int)
+        wet = ~self.IS_FLOATING[kind] & self.in_world(tx, ty)
+        wet[wet] = self.IS_WATER[self.world[tx[wet], ty[wet]]]
+        self.damage_animal(a[wet], scale[wet])
+
+    def lod(self, count, last):
+        # Which animals to update on the count'th tick, and how many ticks' worth each gets since it
+        # was last updated, going by and then moving on the Mobs field named last. Anything on screen
+        # or close enough to see the player goes every tick, the rest in batches by their phase.
+        m = self.animals
+        done = getattr(m, last)
+        done[done < 0] = count - 1  # Anything new only has this tick to catch up on
+        tw, th = self.ground.tw, self.ground.th
+        x, y = m.x + self.scroll[0], m.y + self.scroll[1]
+        near = (x > -tw) & (x < self.screen.get_width()) & (y > -th) & (y < self.screen.get_height())
+        near |= (self.pos[0] - m.x) ** 2 + (self.pos[1] - m.y) ** 2 < (self.MOB_V_RANGE[m.kind] * tw) ** 2
+
+        a = np.flatnonzero(near | ((m.phase + count) % self.LOD_STEPS == 0))
+        scale = count - done[a]
+        done[a] = count
+        return a, scale
+
+    def update_flow(self):
+        # One Dijkstra out from the player that every hostile walker in sight of them
+        # shares, over only the part of the map they could be in. Tiles cost more the
+        # slower they are to cross, and g_entities can't be crossed.
+        m = self.animals
+        tw = self.ground.tw
+        seen = self.IS_HOSTILE[m.kind] & ~self.IS_FLOATING[m.kind] & \
+            ((self.pos[0] - m.x) ** 2 + (self.pos[1] - m.y) ** 2 < (self.MOB_V_RANGE[m.kind] * tw) ** 2)
+        reach = int(self.MOB_V_RANGE[m.kind[seen]].max()) + self.FLOW_MARGIN if seen.any() else 0
+
+        px = int((self.pos[0] + self.player.get_width() / 2) // tw)
+        py = int((self.pos[1] + self.player.get_height() / 2) // self.ground.th)
+        gx, gy = min(max(px, 0), self.WIDTH - 1), min(max(py, 0), self.HEIGHT - 1)
+        if (gx, gy, reach) == self.flow_key and not self.flow_stale:
+            return
+        self.flow_key, self.flow_stale = (gx, gy, reach), False
 
-                # noinspection PyTypeChecker
-                if dist < self.ground.tw * self.RANGE[i[2]]:
-                    # noinspection PyTypeChecker
-                    self.damage_player(self.ATTACK[i[2]] / self.armour)
+        self.flow[...] = -1
+        if not reach:
+            return
+        x0, x1 = max(gx - reach, 0), min(gx + reach + 1, self.WIDTH)
+        y0, y1 = max(gy - reach, 0), min(gy + reach + 1, self.HEIGHT)
+        cost = 1 / self.TILE_SPEED[self.world[x0:x1, y0:y1]]
+        cost[self.solid[x0:x1, y0:y1]] = np.inf
+        self.flow[x0:x1, y0:y1] = flow_field(distances(cost, (gx - x0, gy - y0)), self.DIRECTION.values())
+
+    def steer(self, a, floating):
+        # Point hostile walkers in a that can see the player along the flow field. They keep
+        # to the middle of a row or column of tiles so they don't catch on corners, and this
+        # returns how far each one can go this step without overshooting it.
+        m = self.animals
+        tw, th = self.ground.tw, self.ground.th
+        x, y = m.x[a], m.y[a]
+        limit = np.full(len(a), np.inf)
+
+        seen = (self.pos[0] - x) ** 2 + (self.pos[1] - y) ** 2 < (self.MOB_V_RANGE[m.kind[a]] * tw) ** 2
+        f = np.flatnonzero(seen & ~floating)
+        tx = np.clip(np.rint(x[f] / tw).astype(int), 0, self.WIDTH - 1)
+        ty = np.clip(np.rint(y[f] / th).astype(int), 0, self.HEIGHT - 1)
+        d = self.flow[tx, ty].astype(int)
+
+        # Anywhere without a route keeps heading straight for the player
+        f, tx, ty, d = f[d >= 0], tx[d >= 0], ty[d >= 0], d[d >= 0]
+        off_x, off_y = tx * tw - x[f], ty * th - y[f]
+        across = np.where(d % 2, off_y, off_x)
+        d = np.where(across == 0, d, np.where(d % 2, np.where(off_y > 0, 2, 0), np.where(off_x > 0, 3, 1)))
+
+        m.direction[a[f]] = d
+        limit[f] = np.where(across == 0, np.inf, np.abs(across))
+        return limit
+
+    def in_world(self, tx, ty):
+        return (tx >= 0) & (tx < self.WIDTH) & (ty >= 0) & (ty < self.HEIGHT)
+
+    def solid_at(self, tx, ty):
+        # self.solid for arrays of tiles, with everything off the world counting as open
+        inside = self.in_world(tx, ty)
+        return inside & self.solid[np.where(inside, tx, 0), np.where(inside, ty, 0)]
 
-            if do_rand and random.random() > 0.8:
-                i[4] = (i[4] + random.randint(-1, 1)) % 4
+    def med_tick(self):
+        # Fixed step animal movement, run every MED_TICK seconds from tick. Far away
+        # animals only move every few ticks, but by that many steps at once.
+        self.med_ticks += 1
+        m = self.animals
+        tw, th = self.ground.tw, self.ground.th
+        a, scale = self.lod(self.med_ticks, 'last_med')
+        x, y = m.x[a], m.y[a]
+        floating = self.IS_FLOATING[m.kind[a]]
+
+        # Walkers inside a g_entity get pushed out the way they're facing
+        step = self.STEPS[m.direction[a]]
+        tx, ty = (x // tw).astype(int), (y // th).astype(int)
+        stuck = ~floating & self.solid_at(tx, ty)
+        while stuck.any():
+            x[stuck] += step[stuck, 0] * tw
+            y[stuck] += step[stuck, 1] * th
+            tx[stuck], ty[stuck] = x[stuck] // tw, y[stuck] // th
+            stuck &= self.solid_at(tx, ty)
+        m.x[a], m.y[a] = x, y
+
+        # Anything that's wandered off the world is gone
+        inside = self.in_world(tx, ty)
+        gone = a[~inside]
+        a, scale, x, y, floating, tx, ty = (i[inside] for i in (a, scale, x, y, floating, tx, ty))
+
+        limit = self.steer(a, floating)
+        step = self.STEPS[m.direction[a]]
+        speed = m.speed[a] * scale
+        speed = np.where(floating, speed, self.TILE_SPEED[self.world[tx, ty]] * speed / 16)
+        speed = np.minimum(speed, limit)
+        nx, ny = x + step[:, 0] * speed, y + step[:, 1] * speed
+
+        # Walkers can't step into any tile their new position overlaps
+        ntx, nty = (nx // tw).astype(int), (ny // th).astype(int)
+        span_x, span_y = nx % tw != 0, ny % th != 0
+        hits = (
+            ((0, 0), self.solid_at(ntx, nty)),
+            ((0, 1), span_y & self.solid_at(ntx, nty + 1)),
+            ((1, 0), span_x & self.solid_at(ntx + 1, nty)),
+            ((1, 1), span_x & span_y & self.solid_at(ntx + 1, nty + 1)),
+        )
+        blocked = ~floating & (hits[0][1] | hits[1][1] | hits[2][1] | hits[3][1])
+
+        # Breakers chew on the first thing in their way instead
+        for n in np.flatnonzero(blocked & self.IS_BREAKER[m.kind[a]]).tolist():
+            for (dxi, dyi), hit in hits:
+                if hit[n]:
+                    j = self.g_entities.get((ntx[n] + dxi, nty[n] + dyi))
+                    if j is not None:
+                        j[3] -= random.random() / 3 * scale[n]
+                        if j[3] <= 0:
+                            self.set_g(j[0], j[1], None)
+                            if j[2] == self.ALTAR:
+                                self.altars -= 1
+                    break
 
-            if i[2] not in self.FLOATING:
-                tx, ty = int(i[0] // self.ground.tw), int(i[1] // self.ground.th)
-                if 0 <= tx < self.WIDTH and 0 <= ty < self.HEIGHT:
-                    if self.world[tx][ty] in (self.WATER, self.WATER_M, self.WATER_D):
-                        self.damage_animal(i)
+        m.x[a] = np.where(blocked, x, nx)
+        m.y[a] = np.where(blocked, y, ny)
+        m.remove(gone)
 
-    def med_tick(self):
-        while not self.active:
-            time.sleep(0.1)
-
-        while self.active:
-            ge = {(int(i[0]), int(i[1])): i for i in self.g_entities}
-
-            # Move animals
-            for i in self.animals:
-                if i[2] in self.FLOATING:
-                    tx, ty = int(i[0] // self.ground.tw), int(i[1] // self.ground.th)
-                    if not (0 <= tx < self.WIDTH and 0 <= ty < self.HEIGHT):
-                        self.animals.remove(i)
-                        continue
-
-                    dx, dy = self.DIRECTION[i[4]]
-                    i[0] += dx * i[5]
-                    i[1] += dy * i[5]
-                else:
-                    while True:
-                        tx, ty = int(i[0] // self.ground.tw), int(i[1] // self.ground.th)
-
-                        if (tx, ty) not in ge:
-                            break
-                        i[0] += self.DIRECTION[i[4]][0] * self.ground.tw
-                        i[1] += self.DIRECTION[i[4]][1] * self.ground.th
-                    if 0 <= tx < self.WIDTH and 0 <= ty < self.HEIGHT:
-                        speed_mod = self.SPEED.get(self.world[tx][ty], 1)
-                    else:
-                        self.animals.remove(i)
-                        continue
-
-                    dx, dy = self.DIRECTION[i[4]]
-                    dx *= speed_mod * i[5] / 16
-                    dy *= speed_mod * i[5] / 16
-
-                    ntx, nty = int((i[0] + dx) // self.ground.tw), int((i[1] + dy) // self.ground.th)
-
-                    for dxi in range(0, 2 if (i[0] + dx) % self.ground.tw != 0 else 1):
-                        for dyi in range(0, 2 if (i[1] + dy) % self.ground.th != 0 else 1):
-                            if (ntx + dxi, nty + dyi) in ge:
-                                if i[2] in self.BREAKERS:
-                                    j = ge[(ntx + dxi, nty + dyi)]
-                                    j[3] -= random.random() / 3
-                                    if j[3] <= 0:
-                                        self.set_g(j[0], j[1], None)
-                                        if j[2] == self.ALTAR:
-                                            self.altars -= 1
-                                break
-                        else:
-                            continue
-                        break
-                    else:
-                        i[0] += dx
-                        i[1] += dy
-            time.sleep(0.1)
-
-    def damage_animal(self, animal, amount=1):
-        animal[3] -= amount
-
-        if animal[3] <= 0:
-            self.animals.remove(animal)
-
-            if animal[2] == self.PIG:
+    def damage_animal(self, indices, amount=1):
+        # Hurt one or more animals by index, removing any that die
+        m = self.animals
+        indices = np.atleast_1d(indices)
+        m.health[indices] -= amount
+
+        dead = indices[m.health[indices] <= 0]
+        for n in dead.tolist():
+            kind = self.MOBS[m.kind[n]]
+            x, y = m.x[n] / self.ground.tw, m.y[n] / self.ground.th
+
+            if kind == self.PIG:
                 if random.random() > .5:
-                    self.drop_item(animal[0] / self.ground.tw, animal[1] / self.ground.th, self.PIG_HEART)
-                self.drop_item(animal[0] / self.ground.tw, animal[1] / self.ground.th, self.PIG_MEAT)
-            elif animal[2] == self.Z_PIG:
-                self.drop_item(animal[0] / self.ground.tw, animal[1] / self.ground.th, self.PIG_HEART)
-            elif animal[2] in self.HOSTILE:
+                    self.drop_item(x, y, self.PIG_HEART)
+                self.drop_item(x, y, self.PIG_MEAT)
+            elif kind == self.Z_PIG:
+                self.drop_item(x, y, self.PIG_HEART)
+            elif kind in self.HOSTILE:
                 for i in self.GEMS:
                     if random.random() > self.GEMS[i]:
-                        self.drop_item(animal[0] / self.ground.tw, animal[1] / self.ground.th, i)
+                        self.drop_item(x, y, i)
+        m.remove(dead)
 
     def click(self, pos):
         hbw = self.assets.tw * 2 + 16
@@ -879,36 +1120,38 @@ class GameScene(Scene):
         xp, yp = pos[0] - self.scroll[0], pos[1] - self.scroll[1]
         tx, ty = int(xp // self.ground.tw), int(yp // self.ground.th)
 
-        for i in list(self.animals):
-            r = pygame.Rect(*i[0:2], self.ground.tw, self.ground.th)
-            if r.collidepoint(xp, yp):
-                self.damage_animal(i, self.swing_damage())
-                self.m_lock = True
-                return
+        # Same hit box as a pygame.Rect at the animal, which truncates its corner
+        m = self.animals
+        x, y, xp, yp = np.trunc(m.x), np.trunc(m.y), math.trunc(xp), math.trunc(yp)
+        hit = np.flatnonzero((x <= xp) & (xp < x + self.ground.tw) & (y <= yp) & (yp < y + self.ground.th))
+        if len(hit):
+            self.damage_animal(hit[0], self.swing_damage())
+            self.m_lock = True
+            return
 
-        for i in list(self.g_entities):
+        i = self.g_entities.get((tx, ty))
+        if i is not None:
             x, y, _, __ = i
-            r = pygame.Rect(x * self.ground.tw, y * self.ground.th, self.ground.tw, self.ground.th)
-            if r.collidepoint(xp, yp):
-                if i[2] in self.HEALTH:
-                    i[3] -= self.damage()
-                    if i[3] <= 0:
-                        self.set_g(i[0], i[1], None)
-                        if i[2] == self.ALTAR:
-                            self.altars -= 1
-
-                        self.drop_item(x + 0.1, y + 0.1, self.E_DROPS[i[2]])
-                        if i[2] == self.TREE:
-                            if random.random() > 0.3:
-                                self.drop_item(x, y, self.APPLE)
-                        self.hunger -= self.HUNGER[i[2]]
-                    self.m_lock = True
-                    return
+            if i[2] in self.HEALTH:
+                i[3] -= self.damage()
+                if i[3] <= 0:
+                    self.set_g(i[0], i[1], None)
+                    if i[2] == self.ALTAR:
+                        self.altars -= 1
+
+                    self.drop_item(x + 0.1, y + 0.1, self.E_DROPS[i[2]])
+                    if i[2] == self.TREE:
+                        if random.random() > 0.3:
+                            self.drop_item(x, y, self.APPLE)
+                    self.hunger -= self.HUNGER[i[2]]
+                self.m_lock = True
+                return
 
         if not self.m_lock:
-            if self.world[tx][ty] in self.PROGRESSION:
-                self.digging = (tx, ty, time.time() + self.DIG_T[self.world[tx][ty]],
-                                self.PROGRESSION[self.world[tx][ty]], self.DROPS[self.world[tx][ty]])
+            tile = self.world[tx, ty]
+            if self.TILE_PROGRESSION[tile] >= 0:
+                self.digging = (tx, ty, self.time + self.TILE_DIG_T[tile],
+                                self.TILE_PROGRESSION[tile], self.TILE_DROPS[tile])
 
     def damage(self):
         if self.hotbar[self.hb_p] is None:
@@ -926,26 +1169,20 @@ class GameScene(Scene):
 
     def do_craft(self):
         p_rect = pygame.Rect(*self.pos, *self.player.get_size())
-        usable = []
-
-        for i in list(self.entities):
-            x, y, _ = i
-            if p_rect.colliderect(pygame.Rect(x * self.ground.tw, y * self.ground.th, self.ground.tw, self.ground.th)):
-                usable.append(i)
-
-        for i in self.RECIPIES:
-            crafted = self.can_craft(i, usable)
-            if crafted:
-                cost = self.SACRIFICES.get(self.RECIPIES[i], 0)
-                if cost > self.health:
-                    self.do_chat('You need {} hp to form this'.format(cost))
-                else:
-                    for j in crafted:
-                        self.entities.remove(j)
-                    self.drop_item(self.pos[0] / self.ground.tw, self.pos[1] / self.ground.th, self.RECIPIES[i])
+        usable = list(self.entities.in_rect(p_rect, self.ground.tw, self.ground.th))
+
+        recipe = self.RECIPE_BOOK.match(i[2] for i in usable)
+        if recipe is not None:
+            needs, result = recipe
+            cost = self.SACRIFICES.get(result, 0)
+            if cost > self.health:
+                self.do_chat('You need {} hp to form this'.format(cost))
+            else:
+                for j in self.ingredients(needs, usable):
+                    self.entities.remove(j)
+                self.drop_item(self.pos[0] / self.ground.tw, self.pos[1] / self.ground.th, result)
 
-                    self.damage_player(cost)
-                break
+                self.damage_player(cost)
 
     @property
     def armour(self):
@@ -957,25 +1194,19 @@ class GameScene(Scene):
         return base
 
     @staticmethod
-    def can_craft(ingredients, usable):
+    def ingredients(needs, usable):
+        # The first however many of each item in usable that a recipe needs
         used = []
-        ingredients, usable = list(ingredients), list(usable)
-        for i in ingredients:
-            for j in usable:
-                if j[2] == i:
-                    break
-            else:
-                return False
-            usable.remove(j)
-            used.append(j)
+        needs = dict(needs)
+        for i in usable:
+            if needs.get(i[2], 0) > 0:
+                needs[i[2]] -= 1
+                used.append(i)
         return used
 
     def drop_item(self, x, y, item):
-        for ix, iy, ii in self.entities:
-            if ii not in self.NO_PICKUP:
-                if math.sqrt((ix - x) ** 2 + (iy - y) ** 2) < self.STACK_DIST:
-                    return self.drop_item(x + self.STACK_DIST, y, item)
-        self.entities.append([x, y, item])
+        x, y = self.entities.free_slot(x, y, self.STACK_DIST, self.NO_PICKUP)
+        self.entities.add([x, y, item])
 
     def do_wave(self):
         if self.difficulty == 1:
@@ -993,25 +1224,28 @@ class GameScene(Scene):
                 if j == self.VAMPIRE and self.wave <= 7:
                     continue
 
-                while True:
-                    x, y = random.randint(0, self.WIDTH - 1), random.randint(0, self.HEIGHT - 1)
-                    if (x * self.ground.tw - self.pos[0]) ** 2 + (y * self.ground.th - self.pos[1]) ** 2 < 10 ** 2:
-                        continue
-                    if self.world[x][y] in self.PLACEABLE:
-                        for i in self.g_entities:
-                            if i[0] == x and i[1] == y:
-                                break
-                        else:
-                            break
-
-                self.animals.append([
-                    x * self.ground.tw, y * self.ground.th,
-                    j, self.A_HEALTH[j], 0, 16
-                ])
+                tile = self.spawn_tile(10)
+                if tile is None:
+                    continue
+
+                x, y = tile
+                self.animals.add(x * self.ground.tw, y * self.ground.th, self.MOBS.id(j), self.A_HEALTH[j], 0, 16)
 
         self.do_chat('Incoming wave. Next wave in {}m'.format(self.WAVE_TIMERS[self.wave] * max(1, self.altars - 2)))
 
     def tick(self, dt):
+        self.time += dt
+        self.last_pos, self.last_scroll = list(self.pos), list(self.scroll)
+        for job in self.scheduler.due(self.time):
+            with self._game.profiler.phase('GameScene.' + job.name):
+                job()
+
+        self.med_timer += dt
+        while self.med_timer >= self.MED_TICK:
+            self.med_timer -= self.MED_TICK
+            with self._game.profiler.phase('GameScene.med_tick'):
+                self.med_tick()
+
         self.wave_timer += dt
         if self.wave_timer > self.WAVE_TIMERS[self.wave] * 60 * max(1, self.altars - 2):
             self.do_wave()
@@ -1019,8 +1253,8 @@ class GameScene(Scene):
             self._game.game_over.active = True
             self.active = False
 
-        keys = pygame.key.get_pressed()
-        mods = pygame.key.get_mods()
+        keys = self._game.input.keys()
+        mods = self._game.input.mods()
 
         right = keys[pygame.K_d] or keys[pygame.K_RIGHT]
         left = keys[pygame.K_a] or keys[pygame.K_LEFT]
@@ -1029,7 +1263,7 @@ class GameScene(Scene):
 
         # Move player
         tx, ty = int(self.pos[0] // self.ground.tw), int(self.pos[1] // self.ground.th)
-        speed_mod = self.SPEED.get(self.world[tx][ty], 1)
+        speed_mod = self.TILE_SPEED[self.world[tx, ty]]
 
         if mods & pygame.KMOD_SHIFT:
             speed_mod *= self.SHIFT_SPEED
@@ -1057,33 +1291,27 @@ class GameScene(Scene):
 
         if dx:
             p_rect = pygame.Rect(self.pos[0] + dx, self.pos[1], *self.player.get_size())
-            for x, y, _, __ in list(self.g_entities):
-                if p_rect.colliderect(
-                        pygame.Rect(x * self.ground.tw, y * self.ground.th, self.ground.tw, self.ground.th)):
-                    if p_rect.left < x * self.ground.tw:
-                        self.pos[0] = x * self.ground.tw - self.player.get_width()
-                        break
-                    else:
-                        self.pos[0] = (x + 1) * self.ground.tw
-                        break
+            for x, y, _, __ in self.g_touching(p_rect):
+                if p_rect.left < x * self.ground.tw:
+                    self.pos[0] = x * self.ground.tw - self.player.get_width()
+                else:
+                    self.pos[0] = (x + 1) * self.ground.tw
+                break
             else:
                 self.pos[0] += dx
         if dy:
             p_rect = pygame.Rect(self.pos[0], self.pos[1] + dy, *self.player.get_size())
-            for x, y, _, __ in list(self.g_entities):
-                if p_rect.colliderect(
-                        pygame.Rect(x * self.ground.tw, y * self.ground.th, self.ground.tw, self.ground.th)):
-                    if p_rect.top < y * self.ground.th:
-                        self.pos[1] = y * self.ground.th - self.player.get_height()
-                        break
-                    else:
-                        self.pos[1] = (y + 1) * self.ground.th
-                        break
+            for x, y, _, __ in self.g_touching(p_rect):
+                if p_rect.top < y * self.ground.th:
+                    self.pos[1] = y * self.ground.th - self.player.get_height()
+                else:
+                    self.pos[1] = (y + 1) * self.ground.th
+                break
             else:
                 self.pos[1] += dy
 
         if (tx, ty) != self.last_tile:
-            for i in self.entities:
+            for i in self.entities.at(tx, ty):
                 x, y, p = i
                 if x == tx and y == ty and p == self.BLOOD:
                     self.entities.remove(i)
@@ -1093,7 +1321,7 @@ class GameScene(Scene):
                 if not mods & pygame.KMOD_SHIFT:
                     if random.random() > .7:
                         self.damage_player(self.BLOOD_COST, False)
-                        self.entities.insert(0, [tx, ty, self.BLOOD])
+                        self.entities.add([tx, ty, self.BLOOD], True)
 
         self.last_tile = (tx, ty)
 
@@ -1110,29 +1338,26 @@ class GameScene(Scene):
 
         # Digging
         if not self.m_lock:
-            pos = pygame.mouse.get_pos()
+            pos = self._game.input.mouse_pos()
             xp, yp = pos[0] - self.scroll[0], pos[1] - self.scroll[1]
             tx, ty = int(xp // self.ground.tw), int(yp // self.ground.th)
             if self.digging is None or (tx, ty) != self.digging[0:2]:
-                if pygame.mouse.get_pressed()[0]:
+                if self._game.input.mouse_buttons()[0]:
                     self.click(pos)
 
             if self.digging is not None:
-                if time.time() >= self.digging[2]:
-                    self.set_at(tx, ty, self.digging[3])
+                if self.time >= self.digging[2]:
+                    self.set_at(tx, ty, self.GROUND[self.digging[3]])
                     self.drop_item(tx, ty, self.digging[4])
-                    self.hunger -= self.HUNGER[self.digging[3]]
+                    self.hunger -= self.TILE_HUNGER[self.digging[3]]
                     self.set_g(tx, ty, None)
                     self.digging = None
 
         # Picking up
         p_rect = pygame.Rect(*self.pos, *self.player.get_size())
         if keys[pygame.K_f]:
-            for i in list(self.entities):
-                x, y, _ = i
-                if p_rect.colliderect(
-                        pygame.Rect(x * self.ground.tw, y * self.ground.th, self.ground.tw, self.ground.th)):
-                    self.pickup(i)
+            for i in list(self.entities.in_rect(p_rect, self.ground.tw, self.ground.th)):
+                self.pickup(i)
 
     def pickup(self, entity):
         if entity[2] in self.NO_PICKUP:
@@ -1153,85 +1378,231 @@ class GameScene(Scene):
                     return
 
     def do_chat(self, msg):
-        self.chat.append((msg, time.time()))
-
-    def render(self):
-        cx, cy = int(self.pos[0] // (self.CHUNK_W * self.ground.tw)), int(
-            self.pos[1] // (self.CHUNK_H * self.ground.th))
-        sp = self.scroll[0] + (cx * self.CHUNK_W * self.ground.tw), self.scroll[1] + (
-                cy * self.CHUNK_H * self.ground.th)
-        for dx in range(-1 if sp[0] > 0 else 0,
-                        2 if sp[0] + self.CHUNK_W * self.ground.tw < self.screen.get_width() else 1):
-            for dy in range(-1 if sp[1] > 1 else 0,
-                            2 if sp[1] + self.CHUNK_H * self.ground.th < self.screen.get_height() else 1):
-                self.screen.blit(self.chunks[cx + dx][cy + dy], (
-                    sp[0] + (dx * self.CHUNK_W * self.ground.tw), sp[1] + (dy * self.CHUNK_W * self.ground.tw)))
-                self.screen.blit(self.o_chunks[cx + dx][cy + dy], (
-                    sp[0] + (dx * self.CHUNK_W * self.ground.tw), sp[1] + (dy * self.CHUNK_W * self.ground.tw)))
+        # A copy of the text of our own to fade out
+        self.chat.append((msg, self.time, self.font.render(msg, True).convert()))
+
+    def interpolated(self):
+        # Scroll and player position part way between the last two ticks, for drawing
+        alpha = self._game.alpha
+        scroll = [p + (n - p) * alpha for p, n in zip(self.last_scroll, self.scroll)]
+        pos = [p + (n - p) * alpha for p, n in zip(self.last_pos, self.pos)]
+        return scroll, pos
+
+    def blit(self, surface, pos):
+        # Blit to the screen, noting where for the dirty rect renderer
+        rect = self.screen.blit(surface, pos)
+        self.drawn.append(rect)
+        return rect
+
+    def blits(self, layer):
+        # Many blits in one go, noting where like blit
+        if self._game.DIRTY:
+            self.drawn += self.screen.blits(layer)
+        else:
+            self.screen.blits(layer, False)
+
+    def draw_world(self, surface, scroll, area):
+        # Everything that only changes when the world does (the tiles, items on the
+        # ground and health bars) for area of the screen
+        # Only chunks on screen get built, anything else can be dropped
+        cw, ch = self.CHUNK_W * self.ground.tw, self.CHUNK_H * self.ground.th
+        sx, sy = math.floor(scroll[0]), math.floor(scroll[1])
+        for cx in range(max(0, (area.left - sx) // cw), min(self.X_CHUNKS, math.ceil((area.right - sx) / cw))):
+            for cy in range(max(0, (area.top - sy) // ch), min(self.Y_CHUNKS, math.ceil((area.bottom - sy) / ch))):
+                ground, overlay = self.chunks.get(cx, cy)
+                surface.blit(ground, (cx * cw + sx, cy * ch + sy))
+                surface.blit(overlay, (cx * cw + sx, cy * ch + sy))
 
         if self.digging is not None:
-            x = self.digging[0] * self.ground.tw + self.scroll[0]
-            y = self.digging[1] * self.ground.th + self.scroll[1]
-            self.screen.blit(self.ground.get_at(*self.FRACTURE), (x, y))
+            x = self.digging[0] * self.ground.tw + scroll[0]
+            y = self.digging[1] * self.ground.th + scroll[1]
+            surface.blit(self.ground.get_at(*self.FRACTURE), (x, y))
 
-        for x, y, p in self.entities:
-            x = x * self.ground.tw + self.scroll[0]
-            y = y * self.ground.th + self.scroll[1]
-            if self.screen.get_width() > x > -self.ground.tw and self.screen.get_height() > y > - self.ground.th:
-                self.screen.blit(self.ground.get_at(*p), (x, y))
+        view = pygame.Rect(area.left - scroll[0], area.top - scroll[1], area.width, area.height)
+        # Blood always goes underneath everything else
+        tw, th, get_at = self.ground.tw, self.ground.th, self.ground.get_at
+        items = sorted(self.entities.in_rect(view, tw, th), key=lambda i: i[2] not in self.NO_PICKUP)
+        surface.blits([(get_at(*p), (x * tw + scroll[0], y * th + scroll[1])) for x, y, p in items], False)
 
-        for x, y, p, h in self.g_entities:
+        for x, y, p, h in self.g_touching(view):
             if h != self.HEALTH.get(p, h):
-                x = x * self.ground.tw + self.scroll[0]
-                y = y * self.ground.th + self.scroll[1]
-                if self.screen.get_width() > x > -self.ground.tw and self.screen.get_height() > y > - self.ground.th:
-                    pygame.draw.rect(self.screen, (50, 50, 50), (x + 8, y + self.ground.th - 5, self.ground.tw - 16, 4))
+                x = x * self.ground.tw + scroll[0]
+                y = y * self.ground.th + scroll[1]
+                pygame.draw.rect(surface, (50, 50, 50), (x + 8, y + self.ground.th - 5, self.ground.tw - 16, 4))
+
+                nw = ((self.ground.tw - 16) / self.HEALTH[p]) * h
+                pygame.draw.rect(surface, (200, 50, 50), (x + 8, y + self.ground.th - 5, nw, 4))
+
+    def world_state(self, scroll):
+        # What draw_world would draw on screen besides the chunks, as (tile x, tile y, ...)
+        view = pygame.Rect(-scroll[0], -scroll[1], *self.screen.get_size())
+        state = {tuple(i) for i in self.entities.in_rect(view, self.ground.tw, self.ground.th)}
+        state.update(tuple(i) for i in self.g_touching(view) if i[3] != self.HEALTH.get(i[2], i[3]))
+        if self.digging is not None:
+            state.add(tuple(self.digging[:2]))
+        return state
+
+    def render_background(self, scroll):
+        # Put the world back on screen for the dirty rect renderer. Nothing moves while
+        # the camera is still, so only where sprites were last frame and whatever's
+        # changed in the world since need redrawing, from the copy in self.background.
+        screen = self.screen.get_rect()
+        state = self.world_state(scroll)
+        if self.bg_screen is not self.screen or scroll != self.bg_scroll:
+            if self.background is None or self.background.get_size() != screen.size:
+                self.background = pygame.Surface(screen.size).convert()
+            self.draw_world(self.background, scroll, screen)
+            self.screen.blit(self.background, (0, 0))
+            self.dirty = None
+        else:
+            tw, th = self.ground.tw, self.ground.th
+            changed = [pygame.Rect(i[0] * tw + scroll[0], i[1] * th + scroll[1], tw, th)
+                       for i in state ^ self.bg_state]
+            changed += [pygame.Rect(x * tw + scroll[0], y * th + scroll[1], tw, th) for x, y in self.changed_tiles]
+            changed = [i.inflate(2, 2).clip(screen) for i in changed if i.colliderect(screen)]
+            for rect in changed:
+                self.background.set_clip(rect)
+                self.draw_world(self.background, scroll, rect)
+            self.background.set_clip(None)
+
+            self.dirty = self.drawn + changed
+            for rect in self.dirty:
+                self.screen.blit(self.background, rect, rect)
+
+        self.bg_screen, self.bg_scroll, self.bg_state = self.screen, scroll, state
+        self.changed_tiles.clear()
+        self.drawn = []
 
-                    nw = ((self.ground.tw - 16) / self.HEALTH[p]) * h
-                    pygame.draw.rect(self.screen, (200, 50, 50), (x + 8, y + self.ground.th - 5, nw, 4))
+    def render(self):
+        scroll, pos = self.interpolated()
 
-        if pygame.key.get_mods() & pygame.KMOD_SHIFT:
+        if self._game.DIRTY:
+            self.render_background(scroll)
+        else:
+            self.draw_world(self.screen, scroll, self.screen.get_rect())
+            self.dirty = None
+            self.drawn = []
+        self.chunks.trim()
+
+        # Anything drawn over the whole screen means a full redraw, this frame and next
+        overlay = self._game.input.mods() & pygame.KMOD_SHIFT or self._game.input.keys()[pygame.K_h] or \
+            self._game.console.active
+        if overlay:
+            self.dirty = self.bg_scroll = None
+
+        if self._game.input.mods() & pygame.KMOD_SHIFT:
             sw, sh = self.screen.get_size()
             self.col_surf.fill((0, 0, 0, 0))
-            for x, y, p, _, __, ___ in self.animals:
+            m = self.animals
+            for x, y, p in zip(m.x.tolist(), m.y.tolist(), m.kind.tolist()):
+                p = self.MOBS[p]
                 if p in self.RANGE:
-                    x = round(x + self.ground.tw / 2 + self.scroll[0])
-                    y = round(y + self.ground.th / 2 + self.scroll[1])
+                    x = round(x + self.ground.tw / 2 + scroll[0])
+                    y = round(y + self.ground.th / 2 + scroll[1])
                     r = round(self.RANGE[p] * self.ground.tw)
                     if -r <= x <= sw + r and -r <= y <= sh + r:
                         pygame.draw.circle(self.col_surf, (255, 0, 0, 50), (x, y), r)
             self.screen.blit(self.col_surf, (0, 0))
 
-        for x, y, p, h, d, _ in self.animals:
-            x += self.scroll[0]
-            y += self.scroll[1]
-            if self.screen.get_width() > x > -self.ground.tw and self.screen.get_height() > y > - self.ground.th:
-                rot = d * 90 if p not in self.NO_ROT else 0
-                self.screen.blit(self.ground.get_at(*p, rot=rot), (x, y))
-
-                if h != self.A_HEALTH.get(p, h):
-                    pygame.draw.rect(self.screen, (50, 50, 50), (x + 8, y + self.ground.th - 5, self.ground.tw - 16, 4))
-
-                    nw = ((self.ground.tw - 16) / self.A_HEALTH[p]) * h
-                    pygame.draw.rect(self.screen, (200, 50, 50), (x + 8, y + self.ground.th - 5, nw, 4))
+        # All the mobs on screen, then all their health bars on top
+        m = self.animals
+        xs, ys = m.x + scroll[0], m.y + scroll[1]
+        visible = np.flatnonzero((self.screen.get_width() > xs) & (xs > -self.ground.tw) &
+                                 (self.screen.get_height() > ys) & (ys > -self.ground.th))
+        xs, ys, kinds = xs[visible], ys[visible], m.kind[visible]
+        sprites = self.mob_sprites
+        self.blits([(sprites[k][d], (x, y)) for x, y, k, d in
+                    zip(xs.tolist(), ys.tolist(), kinds.tolist(), m.direction[visible].tolist())])
+
+        health = m.health[visible]
+        hurt = np.flatnonzero(health != self.MOB_HEALTH[kinds])
+        widths = (self.ground.tw - 16) / self.MOB_HEALTH[kinds[hurt]] * health[hurt]
+        for x, y, nw in zip(xs[hurt].tolist(), ys[hurt].tolist(), widths.tolist()):
+            pygame.draw.rect(self.screen, (50, 50, 50), (x + 8, y + self.ground.th - 5, self.ground.tw - 16, 4))
+            self.drawn.append(pygame.draw.rect(self.screen, (200, 50, 50), (x + 8, y + self.ground.th - 5, nw, 4)))
 
         player = pygame.transform.rotate(self.player, 360 - self.p_rot)
-        self.screen.blit(player, (self.pos[0] + self.scroll[0], self.pos[1] + self.scroll[1]))
+        self.blit(player, (pos[0] + scroll[0], pos[1] + scroll[1]))
 
         for i in list(self.text_ol):
             t, x, y, a = i
             t.set_alpha(a)
-            self.screen.blit(t, (x + self.scroll[0], y + self.scroll[1]))
+            self.blit(t, (x + scroll[0], y + scroll[1]))
             i[3] -= 5
             i[2] -= 0.1
             if i[3] <= 0:
                 self.text_ol.remove(i)
 
-        # HUD
+        with self._game.profiler.phase('GameScene.hud'):
+            self.render_hud()
+        if self.dirty is not None:
+            self.dirty += self.drawn
+
+        # Help menu
+        if self._game.input.keys()[pygame.K_h]:
+            darken = pygame.Surface(self.screen.get_size())
+            darken.set_alpha(200)
+            self.screen.blit(darken, (0, 0))
+
+            self.screen.blit(self.font2.render('Controls:'), (16, 16))
+            y = 56
+            for line in self.CONTROLS.split('\n'):
+                self.screen.blit(self.font.render(line), (32, y))
+                y += 20
+
+            self.screen.blit(self.font2.render('Recipies:'), (16, y + 16))
+            y += 56
+
+            sx = 32
+            for ingredients, result in self.RECIPIES.items():
+                x = sx
+                for i in ingredients:
+                    self.screen.blit(self.ground.get_at(*i), (x, y))
+                    self.screen.blit(self.assets.get_at(*self.HOTBAR), (x, y))
+                    x += self.assets.tw * 2 + 4
+
+                x += 16
+                self.screen.blit(self.ground.get_at(*result), (x, y))
+                self.screen.blit(self.assets.get_at(*self.HOTBAR_S), (x, y))
+
+                if result in self.SACRIFICES:
+                    t = self.font.render(str(self.SACRIFICES[result]))
+                    self.screen.blit(t, (sx + 4, y + self.assets.th * 2 - 20))
+                    self.screen.blit(self.assets_s.get_at(*self.HEART),
+                                     (sx + 8 + t.get_width(), y + self.assets.th * 2 - 20))
+
+                y += self.assets.th * 2 + 8
+                if y + self.assets.th * 2 > self.screen.get_height():
+                    y = 16
+                    sx += 456
+
+    @staticmethod
+    def flatten(layer):
+        # The (surface, position) pairs in layer drawn onto one surface, as another pair
+        if not layer:
+            return []
+        rect = pygame.Rect(layer[0][1], layer[0][0].get_size())
+        rect.unionall_ip([pygame.Rect(p, i.get_size()) for i, p in layer])
+        surf = pygame.Surface(rect.size, pygame.SRCALPHA).convert_alpha()
+        surf.blits([(i, (p[0] - rect.x, p[1] - rect.y)) for i, p in layer], False)
+        return [(surf, rect.topleft)]
+
+    def hud_layers(self):
+        # The stats and hotbars, only redrawn when something they show has changed
+        hunger = math.ceil(self.hunger) if self.flash else math.floor(self.hunger)
+        key = (math.ceil(self.health), self.health % 1 == 0, self.health % 1 > 0.5, hunger, self.altars, self.flash,
+               self.hb_p, tuple(i and tuple(i) for i in self.hotbar), tuple(i and tuple(i) for i in self.hotbar_2),
+               self.screen.get_size())
+        if key != self.hud_key:
+            self.hud_key = key
+            self.hud = self.flatten(self.hud_stats(hunger)) + self.flatten(self.hud_hotbars())
+        return self.hud
+
+    def hud_stats(self, hunger):
         health = math.ceil(self.health)
         armour = math.ceil(self.armour) if self.flash else math.floor(self.armour)
-        hunger = math.ceil(self.hunger) if self.flash else math.floor(self.hunger)
 
+        icons = []
         for n in range(health):
             x = (self.assets.tw + 8) * n + 32
             y = 32
@@ -1241,47 +1612,26 @@ class GameScene(Scene):
                 (self.BROKEN_HEART if self.flash else None)
 
             if heart is not None:
-                self.screen.blit(self.assets.get_at(*heart), (x, y))
+                icons.append((self.assets.get_at(*heart), (x, y)))
 
-        for n in range(armour):
-            x = (self.assets.tw + 8) * n + 32
-            y = 48 + self.assets.th * 2
-            self.screen.blit(self.assets.get_at(*self.ARMOUR), (x, y))
-
-        for n in range(hunger):
-            x = (self.assets.tw + 8) * n + 32
-            y = 40 + self.assets.th
-            self.screen.blit(self.assets.get_at(*self.SHANK), (x, y))
-
-        for n in range(self.altars):
-            x = (self.assets.tw + 8) * n + 32
-            y = 56 + self.assets.th * 3
-            self.screen.blit(self.assets.get_at(*self.SATANICITY), (x, y))
-
-        if self._game.DEVEL:
-            fps = self.font.render(str(round(self._game.clock.get_fps(), 2)) + ' FPS', True)
-            self.screen.blit(fps, (self.screen.get_width() - fps.get_width() - 8,
-                                   self.screen.get_height() - fps.get_height() - 8))
-
-            brand = self.font.render('Alpha 0.0.1A', True)
-            self.screen.blit(brand, (8, self.screen.get_height() - brand.get_height() - 8))
-
-            dev = self.font.render('RUNNING IN DEVEL ENVIRONMENT')
-            self.screen.blit(dev, (self.screen.get_width() - dev.get_width() - 8, 8))
+        for row, count, icon in ((1, hunger, self.SHANK), (2, armour, self.ARMOUR), (3, self.altars, self.SATANICITY)):
+            surf = self.assets.get_at(*icon)
+            y = 32 + (self.assets.th + 8) * row
+            icons += [(surf, ((self.assets.tw + 8) * n + 32, y)) for n in range(count)]
+        return icons
 
+    def hud_hotbars(self):
+        slots = []
         hbw = self.assets.tw * 2 + 16
         x = (self.screen.get_width() - hbw * len(self.hotbar)) / 2
         y = self.screen.get_height() - hbw - 32
         for n, i in enumerate(self.hotbar):
             if i is not None:
                 nn = self.font.render(str(i[1]), True)
-                self.screen.blit(self.ground.get_at(*i[0]), (x, y))
-                self.screen.blit(nn, (x + 8, y + self.assets.tw * 2 - nn.get_height() - 8))
+                slots.append((self.ground.get_at(*i[0]), (x, y)))
+                slots.append((nn, (x + 8, y + self.assets.tw * 2 - nn.get_height() - 8)))
 
-            if n == self.hb_p:
-                self.screen.blit(self.assets.get_at(*self.HOTBAR_S), (x, y))
-            else:
-                self.screen.blit(self.assets.get_at(*self.HOTBAR), (x, y))
+            slots.append((self.assets.get_at(*(self.HOTBAR_S if n == self.hb_p else self.HOTBAR)), (x, y)))
             x += hbw
 
         if self.dual_hb:
@@ -1290,59 +1640,37 @@ class GameScene(Scene):
             for n, i in enumerate(self.hotbar_2):
                 if i is not None:
                     nn = self.font.render(str(i[1]), True)
-                    self.screen.blit(self.ground.get_at(*i[0]), (x, y))
-                    self.screen.blit(nn, (x + 8, y + self.assets.tw * 2 - nn.get_height() - 8))
+                    slots.append((self.ground.get_at(*i[0]), (x, y)))
+                    slots.append((nn, (x + 8, y + self.assets.tw * 2 - nn.get_height() - 8)))
 
-                self.screen.blit(self.assets.get_at(*self.HOTBAR), (x, y))
+                slots.append((self.assets.get_at(*self.HOTBAR), (x, y)))
                 x += hbw
+        return slots
 
-        # Console
-        y = self.screen.get_height() - 156
-        now = time.time()
-        for line, t in self.chat[::-1]:
-            if now - t > self.SHOW_CHAT:
-                continue
-
-            alpha = round(min(255, (self.SHOW_CHAT - (now - t)) * 255))
-            t = self.font.render(line, True).convert()
-            t.set_alpha(alpha)
-            self.screen.blit(t, (56, y))
-            y -= 20
+    def render_hud(self):
+        self.blits(self.hud_layers())
 
-        # Help menu
-        if pygame.key.get_pressed()[pygame.K_h]:
-            darken = pygame.Surface(self.screen.get_size())
-            darken.set_alpha(200)
-            self.screen.blit(darken, (0, 0))
-
-            self.screen.blit(self.font2.render('Controls:'), (16, 16))
-            y = 56
-            for line in self.CONTROLS.split('\n'):
-                self.screen.blit(self.font.render(line), (32, y))
-                y += 20
+        if self._game.DEVEL:
+            fps = self.font.render(str(round(self._game.clock.get_fps(), 2)) + ' FPS', True)
+            self.blit(fps, (self.screen.get_width() - fps.get_width() - 8,
+                            self.screen.get_height() - fps.get_height() - 8))
 
-            self.screen.blit(self.font2.render('Recipies:'), (16, y + 16))
-            y += 56
+            brand = self.font.render('Alpha 0.0.1A', True)
+            self.blit(brand, (8, self.screen.get_height() - brand.get_height() - 8))
 
-            sx = 32
-            for ingredients, result in self.RECIPIES.items():
-                x = sx
-                for i in ingredients:
-                    self.screen.blit(self.ground.get_at(*i), (x, y))
-                    self.screen.blit(self.assets.get_at(*self.HOTBAR), (x, y))
-                    x += self.assets.tw * 2 + 4
+            dev = self.font.render('RUNNING IN DEVEL ENVIRONMENT')
+            self.blit(dev, (self.screen.get_width() - dev.get_width() - 8, 8))
 
-                x += 16
-                self.screen.blit(self.ground.get_at(*result), (x, y))
-                self.screen.blit(self.assets.get_at(*self.HOTBAR_S), (x, y))
+            self.drawn.append(self._game.profiler.draw(self.screen, self.font, self.screen.get_width() - 8,
+                                                       dev.get_height() + 16))
 
-                if result in self.SACRIFICES:
-                    t = self.font.render(str(self.SACRIFICES[result]))
-                    self.screen.blit(t, (sx + 4, y + self.assets.th * 2 - 20))
-                    self.screen.blit(self.assets_s.get_at(*self.HEART),
-                                     (sx + 8 + t.get_width(), y + self.assets.th * 2 - 20))
+        # Console
+        y = self.screen.get_height() - 156
+        now = self.time
+        for _, t, surf in self.chat[::-1]:
+            if now - t > self.SHOW_CHAT:
+                break
 
-                y += self.assets.th * 2 + 8
-                if y + self.assets.th * 2 > self.screen.get_height():
-                    y = 16
-                    sx += 456
+            surf.set_alpha(round(min(255, (self.SHOW_CHAT - (now - t)) * 255)))
+            self.blit(surf, (56, y))
+            y -= 20
@@ -0,0 +1,91 @@
+import itertools
+import random
+import heapq
+
+
+class Job:
+    def __init__(self, func, name, due, interval=None, jitter=0, heavy=False):
+        self.func = func
+        self.name = name
+        self.at = self.due = due  # When it would run without any jitter, and when it will
+        self.interval = interval  # None to only run once
+        self.jitter = jitter
+        self.heavy = heavy
+        self.cancelled = False
+
+    def __call__(self):
+        return self.func()
+
+    def __repr__(self):
+        return '<Job {} due {:.2f}>'.format(self.name, self.due)
+
+
+class Scheduler:
+    # Jobs to run at times on whatever clock the owner passes to due(). Only one heavy
+    # job is let out per call, so two of them that come due together get spread over
+    # consecutive frames rather than stalling one.
+    def __init__(self):
+        self._heap = []
+        self._order = itertools.count()  # Ties go to whichever was scheduled first
+        self.last = 0  # now as of the last due()
+
+    def _push(self, job):
+        heapq.heappush(self._heap, (job.due, next(self._order), job))
+
+    def after(self, delay, func, name=None, heavy=False):
+        job = Job(func, name or func.__name__, self.last + delay, heavy=heavy)
+        self._push(job)
+        return job
+
+    def every(self, interval, func, name=None, phase=0, jitter=0, heavy=False):
+        # Run every interval, first after phase. Each run can land up to jitter either
+        # side of when it would, without the schedule drifting.
+        job = Job(func, name or func.__name__, self.last + phase + interval, interval, jitter, heavy)
+        self._push(job)
+        return job
+
+    @staticmethod
+    def cancel(job):
+        # It stays in the heap until it comes due, then gets thrown away
+        job.cancelled = True
+
+    def clear(self):
+        self._heap = []
+
+    def due(self, now):
+        # Jobs to run now, soonest first, with the repeating ones already rescheduled.
+        # Runs missed by falling behind are skipped rather than all run at once.
+        self.last = now
+        ready, later = [], []
+        heavy = False
+        while self._heap and self._heap[0][0] <= now:
+            job = heapq.heappop(self._heap)[2]
+            if job.cancelled:
+                continue
+            if job.heavy:
+                if heavy:
+                    later.append(job)  # Next time
+                    continue
+                heavy = True
+
+            if job.interval is not None:
+                job.at += job.interval
+                if job.at <= now:
+                    job.at += (now - job.at) // job.interval * job.interval + job.interval
+                job.due = job.at
+                if job.jitter:
+                    job.due += random.uniform(-job.jitter, job.jitter)
+                later.append(job)
+            ready.append(job)
+
+        for job in later:
+            self._push(job)
+        return ready
+
+    def pending(self):
+        return sorted((i[2] for i in self._heap if not i[2].cancelled), key=lambda i: i.due)
+
+    def overdue(self, now=None):
+        # Jobs that should have run by now and haven't, like heavy jobs put off a frame
+        now = self.last if now is None else now
+        return [i for i in self.pending() if i.due < now]
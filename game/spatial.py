@@ -0,0 +1,125 @@
+import random
+import math
+
+import pygame
+
+
+class ItemGrid:
+    # Dropped item entities ([x, y, item], in tiles), bucketed by the tile
+    # their corner sits in so lookups only have to look at nearby buckets.
+    def __init__(self, items=()):
+        self._cells = {}
+        self._count = 0
+
+        for i in items:
+            self.add(i)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for cell in list(self._cells.values()):
+            yield from list(cell)
+
+    @staticmethod
+    def _key(x, y):
+        return math.floor(x), math.floor(y)
+
+    def add(self, entity, front=False):
+        cell = self._cells.setdefault(self._key(entity[0], entity[1]), [])
+        if front:
+            cell.insert(0, entity)
+        else:
+            cell.append(entity)
+        self._count += 1
+
+    def remove(self, entity):
+        key = self._key(entity[0], entity[1])
+        self._cells[key].remove(entity)
+        if not self._cells[key]:
+            del self._cells[key]
+        self._count -= 1
+
+    def at(self, x, y):
+        # Everything in the bucket for tile (x, y)
+        return list(self._cells.get((x, y), ()))
+
+    def _range(self, x0, y0, x1, y1):
+        # Everything in buckets x0..x1, y0..y1 inclusive
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            for (cx, cy), cell in list(self._cells.items()):
+                if x0 <= cx <= x1 and y0 <= cy <= y1:
+                    yield from list(cell)
+            return
+
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                if (cx, cy) in self._cells:
+                    yield from list(self._cells[(cx, cy)])
+
+    def in_rect(self, rect, tw, th):
+        # Items whose tile-sized sprite overlaps rect, given in pixels
+        rect = pygame.Rect(rect)
+        x0, y0 = rect.left // tw - 1, rect.top // th - 1
+        x1, y1 = (rect.right - 1) // tw, (rect.bottom - 1) // th
+        for i in self._range(x0, y0, x1, y1):
+            if rect.colliderect(pygame.Rect(i[0] * tw, i[1] * th, tw, th)):
+                yield i
+
+    def in_radius(self, x, y, r):
+        # Items with their corner strictly less than r away from (x, y)
+        for i in self._range(math.floor(x - r), math.floor(y - r), math.floor(x + r), math.floor(y + r)):
+            if math.sqrt((i[0] - x) ** 2 + (i[1] - y) ** 2) < r:
+                yield i
+
+    def free_slot(self, x, y, dist, ignore=()):
+        # Walk right in steps of dist until nothing (bar ignored items) is within dist
+        while any(i[2] not in ignore for i in self.in_radius(x, y, dist)):
+            x += dist
+        return x, y
+
+    def clear(self):
+        self._cells.clear()
+        self._count = 0
+
+
+class SampleSet:
+    # A set that can also hand back a random member in O(1). Members live in a
+    # list, with a dict of where each one is so removal can swap in the last one.
+    def __init__(self, items=()):
+        self._items = []
+        self._index = {}
+
+        for i in items:
+            self.add(i)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._index
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def add(self, item):
+        if item not in self._index:
+            self._index[item] = len(self._items)
+            self._items.append(item)
+
+    def discard(self, item):
+        n = self._index.pop(item, None)
+        if n is None:
+            return
+
+        last = self._items.pop()
+        if n < len(self._items):
+            self._items[n] = last
+            self._index[last] = n
+
+    def sample(self):
+        return random.choice(self._items)
+
+    def clear(self):
+        self._items.clear()
+        self._index.clear()
@@ -0,0 +1,93 @@
+import numpy as np
+
+
+class Palette:
+    # Numbers a set of sheet coordinates so grids of them can live in uint8
+    # arrays. Tables built from a palette are indexed by those same ids.
+    def __init__(self, tiles):
+        self.tiles = tuple(tiles)
+        self._ids = {t: n for n, t in enumerate(self.tiles)}
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def __iter__(self):
+        return iter(self.tiles)
+
+    def __getitem__(self, id_):
+        return self.tiles[id_]
+
+    def __contains__(self, tile):
+        return tile in self._ids
+
+    def id(self, tile):
+        return self._ids[tile]
+
+    def mask(self, *tiles):
+        # `mask[grid]` is a bool grid of where any of tiles are
+        lut = np.zeros(len(self), dtype=bool)
+        lut[[self._ids[t] for t in tiles if t in self._ids]] = True
+        return lut
+
+    def table(self, mapping, default=0, dtype=np.float64):
+        # Per-id numbers from a {tile: value} dict
+        return np.array([mapping.get(t, default) for t in self.tiles], dtype=dtype)
+
+    def remap(self, mapping):
+        # Per-id ids from a {tile: tile} dict, -1 where a tile has no mapping
+        return np.array([self._ids[mapping[t]] if t in mapping else -1 for t in self.tiles], dtype=np.int16)
+
+    def lookup(self, mapping, default=None):
+        # Per-id anything from a {tile: value} dict
+        return tuple(mapping.get(t, default) for t in self.tiles)
+
+
+def touching(mask):
+    # Cells with at least one of their four neighbours set in mask
+    out = np.zeros_like(mask)
+    out[1:] |= mask[:-1]
+    out[:-1] |= mask[1:]
+    out[:, 1:] |= mask[:, :-1]
+    out[:, :-1] |= mask[:, 1:]
+    return out
+
+
+def neighbours(grid, xs, ys, lut):
+    # For each (xs[i], ys[i]), whether any of its four neighbours in grid is set in lut
+    w, h = grid.shape
+    out = np.zeros(len(xs), dtype=bool)
+    for dx, dy in ((0, -1), (-1, 0), (0, 1), (1, 0)):
+        nx, ny = xs + dx, ys + dy
+        valid = (nx >= 0) & (nx < w) & (ny >= 0) & (ny < h)
+        out[valid] |= lut[grid[nx[valid], ny[valid]]]
+    return out
+
+
+class Frontier:
+    # Tiles a cellular automaton needs to look at again because they, or one
+    # of their neighbours, changed since it last ran. Anything not in here is
+    # guaranteed to come out the same as last time.
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._dirty = set()
+
+    def __len__(self):
+        return len(self._dirty)
+
+    def touch(self, x, y):
+        for dx, dy in ((0, 0), (0, -1), (-1, 0), (0, 1), (1, 0)):
+            if 0 <= x + dx < self.width and 0 <= y + dy < self.height:
+                self._dirty.add((x + dx, y + dy))
+
+    def touch_all(self, mask):
+        for x, y in np.argwhere(mask | touching(mask)).tolist():
+            self._dirty.add((x, y))
+
+    def take(self):
+        # Hand over everything dirty as coordinate arrays, and start again from empty
+        dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        xs, ys = np.array(sorted(dirty), dtype=np.intp).T
+        return xs, ys